@@ -0,0 +1,494 @@
+"""Async web entry point, serves the same pages and API as web_app.py
+
+Runs on one event loop shared with a long-lived XScraper, so scrape
+requests reuse a warm, logged in browser instead of launching one per
+request. Mongo is accessed through motor.
+
+    hypercorn asgi_app:app --bind 0.0.0.0:5000
+"""
+from quart import Quart, render_template, request, redirect, url_for, flash, jsonify, make_response, Response
+from bson import ObjectId
+from pymongo import MongoClient
+import os
+import logging
+import asyncio
+from xscraper.scraper import XScraper
+from xscraper.async_db_manager import AsyncDBManager
+from xscraper.db_manager import migrate_string_timestamps, string_timestamps_migrated
+from xscraper.stats import counters_missing, reconcile_counters
+from xscraper.pagination import paginate_records_async
+from xscraper.jobs import (
+    JOB_FAILED, JOB_LEASE_TTL, new_job, claim_job, finish_job, fail_stale_jobs, run_scrape_job, job_progress
+)
+from xscraper.leases import worker_id
+from xscraper.events import scrape_events, format_sse
+from xscraper.cache import TTLCache
+from xscraper.api import API_PREFIX, serialize_document, databases_etag, profiles_etag
+from xscraper.views import (
+    FLASH, SSE_HEADERS, scrape_queued_flash, profile_toggled_flash, database_form, profile_form, database_view,
+    records_filter, records_page_args, records_page_etag, profile_etag, databases_payload, database_payload,
+    profiles_payload, records_payload, job_finished, ends_job_stream
+)
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger(__name__)
+
+# Create Quart app
+app = Quart(__name__)
+app.config["MONGO_URI"] = os.getenv("MONGODB_URI", "mongodb://mongodb:27017/xscraper")
+app.secret_key = os.getenv("SECRET_KEY", "your-secret-key-here")
+
+POSTS_LIMIT = int(os.getenv("POSTS_LIMIT", "30"))
+HEADLESS = os.getenv("HEADLESS", "true").lower() == "true"
+# Seconds shutdown waits for running jobs before cancelling them
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "20"))
+
+# Dashboard data, invalidated by every write through db_manager
+view_cache = TTLCache(
+    ttl=float(os.getenv("VIEW_CACHE_TTL", "30")),
+    max_entries=int(os.getenv("VIEW_CACHE_MAX_ENTRIES", "128"))
+)
+
+db_manager = AsyncDBManager(app.config["MONGO_URI"], cache=view_cache)
+
+# Launched on the first scrape and kept for the lifetime of the app
+scraper = None
+_scraper_lock = asyncio.Lock()
+_job_tasks = set()
+_reaper_task = None
+# Jobs of this process are leased under one owner, like a JobQueue worker
+_owner = worker_id()
+
+def _init_counters(uri: str):
+    """Convert string timestamps and backfill counters for data that predates them (blocking, run in a thread)"""
+    client = MongoClient(uri)
+    try:
+        db = client.get_database()
+        # The conversion scans scraped_data, so it only runs until it completed once
+        if not string_timestamps_migrated(db):
+            converted = migrate_string_timestamps(db)
+            logger.info(f"Converted {converted} string timestamps to dates")
+        if counters_missing(db):
+            fixed = reconcile_counters(db)
+            logger.info(f"Initialized counters on {fixed} documents")
+    finally:
+        client.close()
+
+@app.before_serving
+async def startup():
+    """Connect to MongoDB and initialize collections and indexes"""
+    if not await db_manager.connect():
+        raise RuntimeError("Failed to connect to MongoDB")
+    ensured = await db_manager.ensure_indexes()
+    logger.info(f"Ensured {ensured} indexes")
+
+    if not await db_manager.get_database('cs2'):
+        if await db_manager.add_database('Counter Strike 2', 'cs2'):
+            logger.info("Created default CS2 database")
+
+    await asyncio.to_thread(_init_counters, app.config["MONGO_URI"])
+
+    global _reaper_task
+    _reaper_task = asyncio.create_task(_reap_stale_jobs())
+
+@app.after_serving
+async def shutdown():
+    """Give running jobs SHUTDOWN_TIMEOUT seconds to finish, cancel the rest, then close the browser and MongoDB"""
+    if _reaper_task:
+        _reaper_task.cancel()
+    if _job_tasks:
+        done, pending = await asyncio.wait(set(_job_tasks), timeout=SHUTDOWN_TIMEOUT)
+        if pending:
+            logger.warning(f"Cancelling {len(pending)} scrape jobs still running at shutdown")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+    if scraper:
+        await scraper.close()
+    db_manager.close()
+
+async def _reap_stale_jobs():
+    """Fail jobs whose worker died, here or in another process, once their lease expires"""
+    while True:
+        try:
+            await fail_stale_jobs(db_manager)
+        except Exception as e:
+            logger.error(f"Stale job check failed: {e}")
+        await asyncio.sleep(JOB_LEASE_TTL)
+
+async def _get_scraper() -> XScraper:
+    """The shared scraper, launched and authenticated on first use and relaunched if its browser crashed"""
+    global scraper
+    async with _scraper_lock:
+        if scraper is None:
+            launched = XScraper(headless=HEADLESS)
+            try:
+                await launched.init_browser()
+            except Exception:
+                await launched.close()
+                raise
+            scraper = launched
+        else:
+            await scraper.ensure_browser()
+    return scraper
+
+async def _run_job(job):
+    job_id = job['_id']
+    try:
+        await run_scrape_job(job, await _get_scraper(), db_manager, POSTS_LIMIT)
+    except asyncio.CancelledError:
+        await finish_job(db_manager, job_id, JOB_FAILED, 'Interrupted by shutdown')
+        raise
+    except Exception as e:
+        logger.error(f"Scrape job {job_id} failed: {e}", exc_info=True)
+        await finish_job(db_manager, job_id, JOB_FAILED, str(e))
+
+async def _submit_job(profiles, database_id=None) -> ObjectId:
+    """Store a scrape job, claim it and run it on the app's event loop
+
+    The job is leased before its task starts, so a task that never runs
+    leaves a running job whose lease lapses and the reaper fails, not a
+    queued job nothing claims.
+    """
+    result = await db_manager.db.scrape_jobs.insert_one(new_job(profiles, database_id))
+    job = await claim_job(db_manager, result.inserted_id, owner=_owner)
+    if job:  # otherwise taken by another worker
+        task = asyncio.create_task(_run_job(job))
+        _job_tasks.add(task)
+        task.add_done_callback(_job_tasks.discard)
+    return result.inserted_id
+
+async def _database_overview():
+    """All databases with their counters, served from the view cache"""
+    return await view_cache.aget_or_compute(('overview',), db_manager.get_all_databases)
+
+async def _database_profiles(slug):
+    """Database page context, served from the view cache; None if the slug is unknown"""
+    async def compute():
+        database = await db_manager.get_database(slug)
+        if not database:
+            return None
+        return database_view(database, await db_manager.get_profiles(database['_id']))
+    return await view_cache.aget_or_compute(('database', slug), compute)
+
+async def _records_page(database, profile, page):
+    """Fetch a records page, raises ValueError on a bad page token"""
+    return await paginate_records_async(db_manager.db.scraped_data, records_filter(database, profile), **page)
+
+@app.route('/')
+async def index():
+    try:
+        stats = await _database_overview()
+        return await render_template('index.html', databases=stats)
+    except Exception as e:
+        logger.error(f"Index error: {str(e)}", exc_info=True)
+        await flash(*FLASH['dashboard_error'])
+        return await render_template('index.html', databases=[])
+
+@app.route('/cache/stats')
+async def cache_stats():
+    """Hit and miss counters of the view cache"""
+    return jsonify(view_cache.stats())
+
+@app.route('/scrape_all', methods=['POST'])
+async def scrape_all():
+    """Queue a scrape of all active profiles across all databases"""
+    try:
+        profiles = await db_manager.get_active_profiles()
+        if not profiles:
+            await flash(*FLASH['no_active_profiles'])
+            return redirect(url_for('index'))
+
+        job_id = await _submit_job(profiles)
+        await flash(*scrape_queued_flash(profiles))
+        return redirect(url_for('index', job=str(job_id)))
+    except Exception as e:
+        logger.error(f"Scrape all error: {str(e)}", exc_info=True)
+        await flash(*FLASH['scrape_error'])
+
+    return redirect(url_for('index'))
+
+@app.route('/databases', methods=['GET', 'POST'])
+async def databases():
+    try:
+        if request.method == 'POST':
+            if request.args.get('action') == 'delete':
+                # Handle database deletion
+                slug = request.args.get('slug')
+                if slug:
+                    if await db_manager.get_database(slug):
+                        await db_manager.delete_database(slug)
+                        await flash(*FLASH['database_deleted'])
+                    else:
+                        await flash(*FLASH['database_not_found'])
+            else:
+                # Handle database creation
+                name, slug, error = database_form(await request.form)
+                if error:
+                    await flash(*FLASH[error])
+                elif await db_manager.add_database(name, slug):
+                    await flash(*FLASH['database_added'])
+                else:
+                    logger.error(f"Error adding database {slug}")
+                    await flash(*FLASH['database_exists'])
+
+            return redirect(url_for('databases'))
+
+        return await render_template('databases.html', databases=await _database_overview())
+    except Exception as e:
+        logger.error(f"Databases error: {str(e)}", exc_info=True)
+        await flash(*FLASH['databases_error'])
+        return await render_template('databases.html', databases=[])
+
+@app.route('/databases/<slug>')
+async def view_database(slug):
+    try:
+        view = await _database_profiles(slug)
+        if not view:
+            await flash(*FLASH['database_not_found'])
+            return redirect(url_for('databases'))
+
+        return await render_template('profiles.html', **view)
+    except Exception as e:
+        logger.error(f"View database error: {str(e)}", exc_info=True)
+        await flash(*FLASH['database_error'])
+        return redirect(url_for('databases'))
+
+@app.route('/databases/<slug>/profiles/<profile_id>/records')
+async def view_profile_records(slug, profile_id):
+    try:
+        database = await db_manager.get_database(slug)
+        if not database:
+            await flash(*FLASH['database_not_found'])
+            return redirect(url_for('databases'))
+
+        profile = await db_manager.get_profile(database['_id'], ObjectId(profile_id))
+        if not profile:
+            await flash(*FLASH['profile_not_found'])
+            return redirect(url_for('view_database', slug=slug))
+
+        page = records_page_args(request.args)
+        try:
+            records, next_token, prev_token = await _records_page(database, profile, page)
+        except ValueError:
+            await flash(*FLASH['invalid_page'])
+            return redirect(url_for('view_profile_records', slug=slug, profile_id=profile_id))
+
+        return await render_template('records.html',
+                                     database=database,
+                                     profile=profile,
+                                     records=records,
+                                     limit=page['limit'],
+                                     next_token=next_token,
+                                     prev_token=prev_token)
+    except Exception as e:
+        logger.error(f"View records error: {str(e)}", exc_info=True)
+        await flash(*FLASH['records_error'])
+        return redirect(url_for('view_database', slug=slug))
+
+def _conditional_json(etag: str, build):
+    """JSON response validated by ETag; build() only runs when the client copy is stale"""
+    if request.if_none_match.contains(etag):
+        response = Response('', status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    # Clients may keep the response but must revalidate before using it
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+async def _api_profile(slug, profile_id):
+    """Database and profile documents for an API route, or (None, None)"""
+    database = await db_manager.get_database(slug)
+    if not database or not ObjectId.is_valid(profile_id):
+        return None, None
+    profile = await db_manager.get_profile(database['_id'], ObjectId(profile_id))
+    return (database, profile) if profile else (None, None)
+
+@app.route(f'{API_PREFIX}/databases')
+async def api_databases():
+    """JSON list of game databases with their counters"""
+    databases = await _database_overview()
+    return _conditional_json(databases_etag(databases), lambda: databases_payload(databases))
+
+@app.route(f'{API_PREFIX}/databases/<slug>')
+async def api_database(slug):
+    """JSON game database"""
+    view = await _database_profiles(slug)
+    if not view:
+        return jsonify({'error': 'Not found'}), 404
+    return _conditional_json(profiles_etag(view['database'], view['profiles']), lambda: database_payload(view))
+
+@app.route(f'{API_PREFIX}/databases/<slug>/profiles')
+async def api_profiles(slug):
+    """JSON profiles of a game database"""
+    view = await _database_profiles(slug)
+    if not view:
+        return jsonify({'error': 'Not found'}), 404
+    return _conditional_json(profiles_etag(view['database'], view['profiles']), lambda: profiles_payload(view))
+
+@app.route(f'{API_PREFIX}/databases/<slug>/profiles/<profile_id>')
+async def api_profile(slug, profile_id):
+    """JSON profile"""
+    database, profile = await _api_profile(slug, profile_id)
+    if not profile:
+        return jsonify({'error': 'Not found'}), 404
+    return _conditional_json(profile_etag(profile), lambda: serialize_document(profile))
+
+@app.route(f'{API_PREFIX}/databases/<slug>/profiles/<profile_id>/records')
+async def api_profile_records(slug, profile_id):
+    """JSON records of a profile, newest first, with keyset page tokens"""
+    database, profile = await _api_profile(slug, profile_id)
+    if not profile:
+        return jsonify({'error': 'Not found'}), 404
+
+    page = records_page_args(request.args)
+    etag = records_page_etag(profile, page)
+    if request.if_none_match.contains(etag):
+        return _conditional_json(etag, None)
+
+    try:
+        records, next_token, prev_token = await _records_page(database, profile, page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return _conditional_json(etag, lambda: records_payload(records, page['limit'], next_token, prev_token))
+
+@app.route('/databases/<slug>/profiles/add', methods=['POST'])
+async def add_profile(slug):
+    try:
+        database = await db_manager.get_database(slug)
+        if not database:
+            await flash(*FLASH['database_not_found'])
+            return redirect(url_for('databases'))
+
+        normalized_url, description, error = profile_form(await request.form)
+        if error:
+            await flash(*FLASH[error])
+            return redirect(url_for('view_database', slug=slug))
+
+        # Check if profile already exists
+        existing_profile = await db_manager.db.profiles.find_one({
+            'database_id': database['_id'],
+            'url': normalized_url
+        })
+
+        if existing_profile:
+            await flash(*FLASH['profile_exists'])
+        elif await db_manager.add_profile(database['_id'], normalized_url, description):
+            await flash(*FLASH['profile_added'])
+        else:
+            await flash(*FLASH['profile_add_error'])
+
+        return redirect(url_for('view_database', slug=slug))
+    except Exception as e:
+        logger.error(f"Add profile error: {str(e)}", exc_info=True)
+        await flash(*FLASH['profile_add_error'])
+        return redirect(url_for('view_database', slug=slug))
+
+@app.route('/databases/<slug>/profiles/scrape', methods=['POST'])
+async def scrape_profiles(slug):
+    """Queue a scrape of all active profiles in a database"""
+    try:
+        database = await db_manager.get_database(slug)
+        if not database:
+            await flash(*FLASH['database_not_found'])
+            return redirect(url_for('databases'))
+
+        profiles = await db_manager.get_active_profiles(database['_id'])
+        if not profiles:
+            await flash(*FLASH['no_active_profiles'])
+            return redirect(url_for('view_database', slug=slug))
+
+        job_id = await _submit_job(profiles, database_id=database['_id'])
+        await flash(*scrape_queued_flash(profiles))
+        return redirect(url_for('view_database', slug=slug, job=str(job_id)))
+    except Exception as e:
+        logger.error(f"Scrape profiles error: {str(e)}", exc_info=True)
+        await flash(*FLASH['scrape_error'])
+
+    return redirect(url_for('view_database', slug=slug))
+
+@app.route('/jobs/<job_id>')
+async def job_status(job_id):
+    """JSON progress of a scrape job"""
+    job = None
+    if ObjectId.is_valid(job_id):
+        job = await db_manager.db.scrape_jobs.find_one({'_id': ObjectId(job_id)}, {'profile_ids': 0})
+    if not job:
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify(job_progress(job))
+
+@app.route('/events')
+async def scrape_event_stream():
+    """Server-sent events with live scrape progress, of one job with ?job=<id>"""
+    job_id = request.args.get('job')
+    if job_id:
+        job = None
+        if ObjectId.is_valid(job_id):
+            job = await db_manager.db.scrape_jobs.find_one({'_id': ObjectId(job_id)}, {'status': 1})
+        if job_finished(job):
+            # 204 keeps the browser from reconnecting to a finished job
+            return '', 204
+    subscription = scrape_events.subscribe(job_id)
+
+    async def stream():
+        try:
+            while True:
+                event = await subscription.aget(timeout=15)
+                # Comment lines keep proxies from closing an idle stream
+                yield format_sse(event).encode() if event else b': keepalive\n\n'
+                if event and ends_job_stream(event, job_id):
+                    break
+        finally:
+            scrape_events.unsubscribe(subscription)
+
+    response = await make_response(stream(), {'Content-Type': 'text/event-stream', **SSE_HEADERS})
+    response.timeout = None
+    return response
+
+@app.route('/databases/<slug>/profiles/<profile_id>/toggle', methods=['POST'])
+async def toggle_profile(slug, profile_id):
+    try:
+        new_status = await db_manager.toggle_profile(ObjectId(profile_id))
+        if new_status is None:
+            await flash(*FLASH['profile_not_found'])
+            return redirect(url_for('view_database', slug=slug))
+
+        await flash(*profile_toggled_flash(new_status))
+        return redirect(url_for('view_database', slug=slug))
+    except Exception as e:
+        logger.error(f"Toggle profile error: {str(e)}", exc_info=True)
+        await flash(*FLASH['profile_toggle_error'])
+        return redirect(url_for('view_database', slug=slug))
+
+@app.route('/databases/<slug>/profiles/<profile_id>/delete', methods=['POST'])
+async def delete_profile(slug, profile_id):
+    try:
+        database = await db_manager.get_database(slug)
+        if not database:
+            await flash(*FLASH['database_not_found'])
+            return redirect(url_for('databases'))
+
+        profile = await db_manager.get_profile(database['_id'], ObjectId(profile_id))
+        if not profile:
+            await flash(*FLASH['profile_not_found'])
+            return redirect(url_for('view_database', slug=slug))
+
+        # Delete the profile and its scraped data, keeping counters in sync
+        await db_manager.delete_profile(profile['_id'])
+
+        await flash(*FLASH['profile_deleted'])
+        return redirect(url_for('view_database', slug=slug))
+    except Exception as e:
+        logger.error(f"Delete profile error: {str(e)}", exc_info=True)
+        await flash(*FLASH['profile_delete_error'])
+        return redirect(url_for('view_database', slug=slug))
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,198 @@
+import argparse
+import asyncio
+import json
+import logging
+import signal
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+from xscraper.config import Config
+from xscraper.scraper import XScraper
+from xscraper.async_db_manager import AsyncDBManager
+from xscraper.runner import MONGODB_URI, HEADLESS, run_all_profiles
+
+logger = logging.getLogger(__name__)
+
+COMMANDS = ('run', 'status', 'stop')
+
+class ScraperDaemon:
+    """Keeps one logged in browser resident and scrapes all active profiles on a schedule
+
+    A run starts every config.daemon_interval minutes, or right away when a
+    'run' command arrives on the control socket. SIGTERM, SIGINT or 'stop'
+    cancel the run in progress; its checkpoint in scrape_runs lets the next
+    start resume it.
+    """
+
+    def __init__(self, scraper: XScraper = None, db_manager: AsyncDBManager = None):
+        self.scraper = scraper or XScraper(headless=HEADLESS)
+        self.db_manager = db_manager or AsyncDBManager(MONGODB_URI)
+        self.config = self.scraper.config
+        self.interval = timedelta(minutes=self.config.daemon_interval)
+        self.started_at = None
+        self.next_run_at = None
+        self.last_run = None  # started_at, finished_at and posts of the last completed run
+        self.run_task = None
+        self._trigger = asyncio.Event()
+        self._stopping = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return self.run_task is not None and not self.run_task.done()
+
+    def status(self) -> Dict:
+        return {
+            'state': 'stopping' if self._stopping.is_set() else 'running' if self.running else 'idle',
+            'started_at': self.started_at,
+            'next_run_at': None if self.running else self.next_run_at,
+            'last_run': self.last_run
+        }
+
+    def trigger(self) -> str:
+        """Start a run now unless one is in progress"""
+        if self.running:
+            return 'already running'
+        self._trigger.set()
+        return 'started'
+
+    def stop(self):
+        """Cancel the run in progress and shut down"""
+        if not self._stopping.is_set():
+            logger.info("Stopping scraper daemon")
+        self._stopping.set()
+        self._trigger.set()
+
+    def dispatch(self, command: str) -> Dict:
+        """Reply to a control command"""
+        if command == 'run':
+            return {'ok': True, 'result': self.trigger()}
+        if command == 'status':
+            return {'ok': True, **self.status()}
+        if command == 'stop':
+            self.stop()
+            return {'ok': True, 'result': 'stopping'}
+        return {'ok': False, 'error': f"Unknown command {command!r}, expected one of {', '.join(COMMANDS)}"}
+
+    async def handle_connection(self, reader, writer):
+        """Answer one newline terminated command per connection"""
+        try:
+            command = (await reader.readline()).decode().strip().lower()
+            reply = self.dispatch(command)
+            writer.write((json.dumps(reply, default=str) + '\n').encode())
+            await writer.drain()
+        except Exception as e:
+            logger.error(f"Control connection error: {e}")
+        finally:
+            writer.close()
+
+    async def run_once(self):
+        """Scrape all active profiles on the warm browser"""
+        started_at = datetime.utcnow()
+        await self.scraper.ensure_browser()
+        profiles = await self.db_manager.get_active_profiles()
+        logger.info(f"Found {len(profiles)} active profiles to scrape")
+        posts = await run_all_profiles(self.scraper, self.db_manager, profiles) if profiles else 0
+        # Persist the refreshed session in case the container is killed
+        await self.scraper.auth.save_cookies()
+        self.last_run = {'started_at': started_at, 'finished_at': datetime.utcnow(), 'posts': posts}
+        logger.info(f"Run completed in {(datetime.utcnow() - started_at).total_seconds():.0f}s, {posts} posts scraped")
+
+    async def _run_until_stopped(self):
+        """Run in the background, returns early if the daemon is stopped"""
+        self.run_task = asyncio.create_task(self.run_once())
+        stopping = asyncio.create_task(self._stopping.wait())
+        await asyncio.wait({self.run_task, stopping}, return_when=asyncio.FIRST_COMPLETED)
+        stopping.cancel()
+        if not self.run_task.done():
+            logger.info("Cancelling the run in progress, the next start resumes it")
+            self.run_task.cancel()
+            await asyncio.gather(self.run_task, return_exceptions=True)
+        elif self.run_task.exception():
+            logger.error(f"Scraping run error: {self.run_task.exception()}")
+
+    async def serve(self):
+        """Launch the browser once, then run on schedule and on command until stopped"""
+        if not await self.db_manager.connect():
+            return
+        server = None
+        try:
+            await self.db_manager.ensure_indexes()
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(sig, self.stop)
+
+            started = time.perf_counter()
+            await self.scraper.init_browser()
+            logger.info(f"Browser ready in {time.perf_counter() - started:.1f}s, kept warm between runs")
+
+            server = await asyncio.start_server(
+                self.handle_connection, self.config.daemon_control_host, self.config.daemon_control_port
+            )
+            logger.info(
+                f"Listening for {', '.join(COMMANDS)} on "
+                f"{self.config.daemon_control_host}:{self.config.daemon_control_port}"
+            )
+
+            # Run right away on start, resuming an interrupted run if there is one
+            self.started_at = datetime.utcnow()
+            self.next_run_at = self.started_at
+            while not self._stopping.is_set():
+                wait = max(0.0, (self.next_run_at - datetime.utcnow()).total_seconds())
+                try:
+                    await asyncio.wait_for(self._trigger.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                if self._stopping.is_set():
+                    break
+                self._trigger.clear()
+                await self._run_until_stopped()
+                self.next_run_at = datetime.utcnow() + self.interval
+                if not self._stopping.is_set():
+                    logger.info(f"Next run at {self.next_run_at:%Y-%m-%d %H:%M}")
+
+        except Exception as e:
+            logger.error(f"Scraper daemon error: {str(e)}", exc_info=True)
+        finally:
+            if server:
+                server.close()
+                await server.wait_closed()
+            await self.scraper.close()
+            self.db_manager.close()
+            logger.info("Scraper daemon stopped")
+
+async def send_command(command: str, config: Config) -> Dict:
+    """Send a control command to a running daemon"""
+    reader, writer = await asyncio.open_connection(config.daemon_control_host, config.daemon_control_port)
+    try:
+        writer.write(f"{command}\n".encode())
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resident scraper with a warm browser and its own schedule")
+    parser.add_argument('command', nargs='?', choices=COMMANDS,
+                        help='Send a command to the running daemon instead of starting one')
+    args = parser.parse_args()
+
+    if args.command:
+        try:
+            reply = asyncio.run(send_command(args.command, Config.from_env()))
+        except OSError as e:
+            print(f"Scraper daemon is not reachable: {e}")
+            raise SystemExit(1)
+        print(json.dumps(reply, indent=2, default=str))
+        raise SystemExit(0 if reply.get('ok') else 1)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(),
+            logging.FileHandler('scraper.log')
+        ]
+    )
+    logger.info("Starting scraper daemon")
+    asyncio.run(ScraperDaemon().serve())
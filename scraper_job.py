@@ -1,9 +1,14 @@
+import argparse
 import asyncio
 import logging
-import os
+import time
 from datetime import datetime
-from pymongo import MongoClient
-from xscraper.scraper import XScraper
+from xscraper.scraper import XScraper, RETRYABLE_FAILURES
+from xscraper.async_db_manager import AsyncDBManager
+from xscraper.jobs import scrape_and_store, scrape_failure, profile_since_id, settle_since_id
+from xscraper.scheduler import AdaptiveScheduler, HISTORY_WINDOW, history_rate, plan_next_visit
+from xscraper.leases import LeaseQueue
+from xscraper.runner import MONGODB_URI, POSTS_LIMIT, HEADLESS, run_all_profiles
 
 # Setup logging
 logging.basicConfig(
@@ -16,110 +21,204 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# MongoDB settings
-MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://mongodb:27017/xscraper")
-POSTS_LIMIT = int(os.getenv("POSTS_LIMIT", "30"))
-HEADLESS = os.getenv("HEADLESS", "true").lower() == "true"
-
-async def scrape_and_store(profile_url, database_id, profile_id, mongo_client):
-    """Scrape a profile and store results in MongoDB"""
+async def scrape_all_profiles():
+    """Scrape all active profiles with one warm browser shared across the run"""
     try:
-        # Initialize scraper
+        # Connect to MongoDB without blocking the scraping event loop
+        db_manager = AsyncDBManager(MONGODB_URI)
+        await db_manager.connect()
+        await db_manager.ensure_indexes()
+        
+        # Get all active profiles
+        profiles = await db_manager.get_active_profiles()
+        logger.info(f"Found {len(profiles)} active profiles to scrape")
+        if not profiles:
+            return
+        
+        # Launch and authenticate the browser once for the whole run
         scraper = XScraper(headless=HEADLESS)
+        started = time.perf_counter()
         await scraper.init_browser()
+        launch_time = time.perf_counter() - started
         
         try:
-            # Scrape posts
-            posts = await scraper.scrape_profile(profile_url, POSTS_LIMIT)
-            logger.info(f"Scraped {len(posts)} posts from {profile_url}")
-            
-            if posts:
-                db = mongo_client.get_database()
-                
-                # Store each post
-                for post in posts:
-                    # Add metadata
-                    post['database_id'] = database_id
-                    post['profile_id'] = profile_id
-                    post['profile_url'] = profile_url
-                    post['last_updated'] = datetime.utcnow()
-                    
-                    # Update or insert post
-                    db.scraped_data.update_one(
-                        {
-                            'database_id': database_id,
-                            'profile_id': profile_id,
-                            'id': post['id']
-                        },
-                        {'$set': post},
-                        upsert=True
-                    )
-                
-                # Update profile's last scraped time
-                db.profiles.update_one(
-                    {'_id': profile_id},
-                    {
-                        '$set': {
-                            'last_scraped': datetime.utcnow(),
-                            'last_scrape_count': len(posts)
-                        }
-                    }
-                )
-                
-                # Update database's last updated time
-                db.game_databases.update_one(
-                    {'_id': database_id},
-                    {'$set': {'last_updated': datetime.utcnow()}}
-                )
-                
-                return len(posts)
-            
-            return 0
-            
+            total_posts = await run_all_profiles(scraper, db_manager, profiles)
         finally:
+            started = time.perf_counter()
             await scraper.close()
-            
+            teardown_time = time.perf_counter() - started
+        
+        saved = (launch_time + teardown_time) * (len(profiles) - 1)
+        logger.info(
+            f"Reused one browser for {len(profiles)} profiles "
+            f"(launch {launch_time:.1f}s, teardown {teardown_time:.1f}s): "
+            f"saved ~{saved:.1f}s versus a browser per profile"
+        )
+        logger.info(f"Scraping completed. Total posts scraped: {total_posts}")
+        
     except Exception as e:
-        logger.error(f"Error scraping {profile_url}: {str(e)}")
-        return 0
+        logger.error(f"Scraping job error: {str(e)}")
+    finally:
+        db_manager.close()
 
-async def scrape_all_profiles():
-    """Scrape all active profiles"""
+async def visit_profile(scraper, profile, db_manager):
+    """Scrape a profile and store its posts, returns (new posts or None if the visit should be retried, saturated)"""
+    # After a visit cut short by its deadline the next one scrapes down to the same mark
+    since_id = await profile_since_id(db_manager, profile)
+    posts, stats = await scrape_and_store(
+        scraper, profile['url'], profile['database_id'], profile['_id'], db_manager, POSTS_LIMIT,
+        since_id=since_id
+    )
+    await settle_since_id(db_manager, stats, profile, since_id)
+    if stats.stop_reason:
+        # A scrape cut short by its deadline may have missed posts, like one stopped at the limit
+        return posts, stats.stop_reason in ('limit', 'deadline')
+    failure = scrape_failure(stats)
+    if failure in RETRYABLE_FAILURES:
+        return None, False
+    # Suspended, protected or deleted profiles count as visits without posts, so they back off
+    logger.info(f"{profile['url']} is unavailable ({failure})")
+    return 0, False
+
+def log_schedule(profile, posts, schedule):
+    rate = schedule['post_rate'] or 0.0
+    logger.info(
+        f"{profile['url']}: {posts or 0} new posts, ~{rate * 24:.1f} posts/day, "
+        f"next visit {schedule['next_scrape_at']:%Y-%m-%d %H:%M}"
+    )
+
+async def scrape_and_reschedule(scraper, scheduler, profile, db_manager):
+    """Visit a due profile and persist when it should be visited next"""
+    posts, saturated = await visit_profile(scraper, profile, db_manager)
+    schedule = scheduler.reschedule(profile, posts, datetime.utcnow(), saturated=saturated)
+    await db_manager.update_profile_schedule(profile['_id'], schedule)
+    log_schedule(profile, posts, schedule)
+
+async def seed_post_rate(profile, db_manager):
+    """Estimate the posting rate of a profile never scheduled before from its stored posts"""
+    if profile.get('post_rate') is None:
+        since = datetime.utcnow() - HISTORY_WINDOW
+        recent = await db_manager.count_recent_posts(profile['database_id'], profile['_id'], since)
+        profile['post_rate'] = history_rate(recent)
+
+async def load_schedule(scheduler, db_manager):
+    """Refresh the scheduler from the active profiles, seeding rates from stored history"""
+    profiles = await db_manager.get_active_profiles()
+    for profile in profiles:
+        await seed_post_rate(profile, db_manager)
+    scheduler.load(profiles, datetime.utcnow())
+    logger.info(f"Scheduling {len(profiles)} active profiles")
+
+async def run_adaptive(refresh_interval: float = 300):
+    """Scrape profiles when they are due instead of all of them on a fixed schedule
+
+    Runs until interrupted, on one warm browser. Active profiles are reloaded
+    every refresh_interval seconds so added or toggled profiles are picked up.
+    """
+    db_manager = AsyncDBManager(MONGODB_URI)
+    scraper = None
     try:
-        # Connect to MongoDB
-        client = MongoClient(MONGODB_URI)
-        db = client.get_default_database()
+        if not await db_manager.connect():
+            return
+        await db_manager.ensure_indexes()
         
-        # Get all active profiles
-        profiles = list(db.profiles.find({'active': True}))
-        logger.info(f"Found {len(profiles)} active profiles to scrape")
+        scraper = XScraper(headless=HEADLESS)
+        await scraper.init_browser()
+        scheduler = AdaptiveScheduler(scraper.config)
+        loaded_at = None
         
-        total_posts = 0
-        for profile in profiles:
-            try:
-                posts_count = await scrape_and_store(
-                    profile['url'],
-                    profile['database_id'],
-                    profile['_id'],
-                    client
-                )
-                total_posts += posts_count
-                
-                # Wait between profiles
-                await asyncio.sleep(2)
-                
-            except Exception as e:
-                logger.error(f"Error processing profile {profile['url']}: {str(e)}")
+        while True:
+            if loaded_at is None or time.monotonic() - loaded_at >= refresh_interval:
+                await load_schedule(scheduler, db_manager)
+                loaded_at = time.monotonic()
+            
+            due = scheduler.take_due(datetime.utcnow())
+            if due:
+                await asyncio.gather(*(
+                    scrape_and_reschedule(scraper, scheduler, profile, db_manager) for profile in due
+                ), return_exceptions=True)
                 continue
+            
+            wait = scheduler.seconds_until_next(datetime.utcnow())
+            await asyncio.sleep(min(wait if wait is not None else refresh_interval, refresh_interval))
+            
+    except Exception as e:
+        logger.error(f"Adaptive scraping error: {str(e)}", exc_info=True)
+    finally:
+        if scraper:
+            await scraper.close()
+        db_manager.close()
+
+async def run_worker(drain: bool = False, poll_interval: float = 30):
+    """Scrape profiles claimed through leases, so any number of workers can share the work
+
+    Each of config.max_concurrency slots claims the most overdue profile,
+    scrapes it and releases it with its next visit time. With `drain` the
+    worker exits once nothing is due, otherwise it polls for due profiles.
+    """
+    db_manager = AsyncDBManager(MONGODB_URI)
+    scraper = None
+    leases = None
+    heartbeat = None
+    try:
+        if not await db_manager.connect():
+            return
+        await db_manager.ensure_indexes()
+        
+        scraper = XScraper(headless=HEADLESS)
+        await scraper.init_browser()
+        leases = LeaseQueue(db_manager, ttl=scraper.config.lease_ttl)
+        heartbeat = asyncio.create_task(leases.run_heartbeat())
+        logger.info(f"Worker {leases.owner} started")
+        
+        async def slot():
+            visited = 0
+            while True:
+                profile = await leases.claim()
+                if profile is None:
+                    if drain:
+                        return visited
+                    await asyncio.sleep(poll_interval)
+                    continue
                 
-        logger.info(f"Scraping completed. Total posts scraped: {total_posts}")
+                await seed_post_rate(profile, db_manager)
+                posts, saturated = await visit_profile(scraper, profile, db_manager)
+                schedule = plan_next_visit(profile, posts, datetime.utcnow(), scraper.config, saturated)
+                if await leases.release(profile['_id'], schedule):
+                    log_schedule(profile, posts, schedule)
+                visited += 1
+        
+        results = await asyncio.gather(*(slot() for _ in range(scraper.config.max_concurrency)))
+        logger.info(f"Worker {leases.owner} visited {sum(results)} profiles")
         
     except Exception as e:
-        logger.error(f"Scraping job error: {str(e)}")
+        logger.error(f"Worker error: {str(e)}", exc_info=True)
     finally:
-        client.close()
+        if heartbeat:
+            heartbeat.cancel()
+        if leases:
+            await leases.release_all()
+        if scraper:
+            await scraper.close()
+        db_manager.close()
 
 if __name__ == "__main__":
-    logger.info("Starting scraping job")
-    asyncio.run(scrape_all_profiles())
-    logger.info("Scraping job completed")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scrape active X profiles into MongoDB")
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Run continuously, visiting each profile when new posts are likely')
+    parser.add_argument('--worker', action='store_true',
+                        help='Claim due profiles through leases, for running several scraper containers')
+    parser.add_argument('--drain', action='store_true',
+                        help='With --worker, exit once no profile is due')
+    args = parser.parse_args()
+    
+    if args.worker:
+        logger.info("Starting lease worker")
+        asyncio.run(run_worker(drain=args.drain))
+    elif args.adaptive:
+        logger.info("Starting adaptive scraper")
+        asyncio.run(run_adaptive())
+    else:
+        logger.info("Starting scraping job")
+        asyncio.run(scrape_all_profiles())
+        logger.info("Scraping job completed")
\ No newline at end of file
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark tweet extraction on a synthetic timeline page.
+Compares the legacy per-element Playwright calls against the single
+page.evaluate() extraction used by XScraper._extract_tweets.
+
+Usage: python scripts/benchmark_extraction.py --articles 10 50 100
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from playwright.async_api import async_playwright
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from xscraper.page_scripts import EXTRACT_TWEETS_JS
+
+ARTICLE_TEMPLATE = """
+<article data-testid="tweet">
+  <div data-testid="User-Name"><a href="/bench_user">bench_user</a></div>
+  <a href="/bench_user/status/{id}"><time datetime="2024-01-01T00:00:{second:02d}.000Z">Jan 1</time></a>
+  <div data-testid="tweetText">Benchmark tweet number {n} with some text</div>
+</article>
+"""
+
+def build_page(count):
+    """Build a timeline page with `count` tweet articles"""
+    articles = ''.join(
+        ARTICLE_TEMPLATE.format(id=1700000000000000000 + n, second=n % 60, n=n)
+        for n in range(count)
+    )
+    return f'<html><body><div data-testid="primaryColumn">{articles}</div></body></html>'
+
+async def legacy_extract(page):
+    """Per-element extraction as done before, returns (tweets, round_trips)"""
+    tweets = []
+    round_trips = 1
+    elements = await page.query_selector_all('article[data-testid="tweet"]')
+
+    for element in elements:
+        tweet_link = await element.query_selector('a[href*="/status/"]')
+        round_trips += 1
+        if not tweet_link:
+            continue
+        href = await tweet_link.get_attribute('href')
+        text_element = await element.query_selector('[data-testid="tweetText"]')
+        text = await text_element.text_content() if text_element else ""
+        time_element = await element.query_selector('time')
+        timestamp = await time_element.get_attribute('datetime') if time_element else None
+        round_trips += 5
+        tweets.append({
+            'id': href.split('/status/')[1].split('?')[0],
+            'text': text,
+            'timestamp': timestamp
+        })
+
+    return tweets, round_trips
+
+async def batched_extract(page):
+    """Single round trip extraction, returns (tweets, round_trips)"""
+    result = await page.evaluate(EXTRACT_TWEETS_JS, [])
+    return result['tweets'], 1
+
+async def measure(extract, page, repeat):
+    """Run an extraction `repeat` times, returns (count, round_trips, avg_ms)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        tweets, round_trips = await extract(page)
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    return len(tweets), round_trips, elapsed
+
+async def run_benchmark(article_counts, repeat):
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+
+        print(f"{'articles':>8} {'mode':>8} {'tweets':>7} {'round trips':>12} {'avg ms':>9}")
+        for count in article_counts:
+            await page.set_content(build_page(count))
+            results = {}
+            for name, extract in (('legacy', legacy_extract), ('batched', batched_extract)):
+                results[name] = await measure(extract, page, repeat)
+                tweets, round_trips, elapsed = results[name]
+                print(f"{count:>8} {name:>8} {tweets:>7} {round_trips:>12} {elapsed:>9.2f}")
+
+            speedup = results['legacy'][2] / max(results['batched'][2], 1e-6)
+            print(f"{count:>8} {'speedup':>8} {speedup:>30.1f}x")
+
+        await browser.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tweet extraction strategies")
+    parser.add_argument('--articles', '-a', type=int, nargs='+', default=[10, 50, 100],
+                       help='Number of tweet articles per page')
+    parser.add_argument('--repeat', '-r', type=int, default=5,
+                       help='Extractions per measurement')
+
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.articles, args.repeat))
+
+if __name__ == "__main__":
+    main()
@@ -14,11 +14,17 @@ from pymongo import MongoClient
 from tabulate import tabulate
 from bson import json_util
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from xscraper.indexes import ensure_indexes
+from xscraper.db_manager import migrate_string_timestamps
+
 def connect_mongodb():
     """Connect to MongoDB"""
     uri = os.getenv('MONGODB_URI', 'mongodb://mongodb:27017/xscraper')
     client = MongoClient(uri)
-    return client.xscraper
+    db = client.xscraper
+    ensure_indexes(db)
+    return db
 
 def format_tweet(tweet):
     """Format tweet for display"""
@@ -72,6 +78,11 @@ def clean_old_tweets(db, days):
     result = db.tweets.delete_many({'created_at': {'$lt': cutoff}})
     print(f"\nRemoved {result.deleted_count} tweets older than {days} days")
 
+def migrate_timestamps(db):
+    """Convert record timestamps stored as strings to dates"""
+    converted = migrate_string_timestamps(db)
+    print(f"\nConverted {converted} string timestamps to dates")
+
 def main():
     parser = argparse.ArgumentParser(description="Manage X scraper data")
     parser.add_argument('--list', '-l', type=int, metavar='N',
@@ -82,6 +93,8 @@ def main():
                        help='Export tweets to JSON file')
     parser.add_argument('--clean', '-c', type=int, metavar='DAYS',
                        help='Remove tweets older than DAYS days')
+    parser.add_argument('--migrate-timestamps', action='store_true',
+                       help='Convert record timestamps stored as strings to dates')
     
     args = parser.parse_args()
     
@@ -96,6 +109,8 @@ def main():
             export_data(db, args.export)
         if args.clean:
             clean_old_tweets(db, args.clean)
+        if args.migrate_timestamps:
+            migrate_timestamps(db)
             
         if not any(vars(args).values()):
             # If no arguments provided, show help
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Repair drift in the record_count / profile_count / active_profiles counters
+kept on game_databases and profiles documents.
+Can be run inside Docker container: docker-compose exec web python scripts/reconcile_counters.py
+"""
+
+import argparse
+import os
+import sys
+
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from xscraper.stats import reconcile_counters
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute counters from scraped data")
+    parser.add_argument('--dry-run', '-n', action='store_true',
+                       help='Only report documents with drifted counters')
+
+    args = parser.parse_args()
+
+    try:
+        client = MongoClient(os.getenv('MONGODB_URI', 'mongodb://mongodb:27017/xscraper'))
+        fixed = reconcile_counters(client.get_default_database(), dry_run=args.dry_run)
+        action = 'would be fixed' if args.dry_run else 'fixed'
+        print(f"Counters {action} on {fixed} documents")
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Run XScraper against a local stand-in for X that serves recorded timeline payloads.
+Useful to check network capture mode without touching the real site.
+
+Usage: python scripts/replay_timeline.py [--payload scripts/fixtures/user_tweets.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MONGODB_URI', 'mongodb://localhost:27017/xscraper')
+from xscraper.scraper import XScraper
+
+DEFAULT_PAYLOAD = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'user_tweets.json')
+
+PROFILE_PAGE = """<html><body>
+<div data-testid="primaryColumn"></div>
+<script>fetch('/i/api/graphql/replay/UserTweets?variables=%7B%7D').then(r => r.json());</script>
+</body></html>"""
+
+def make_handler(payload):
+    class ReplayHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if '/graphql/' in self.path:
+                body, content_type = json.dumps(payload).encode(), 'application/json'
+            else:
+                body, content_type = PROFILE_PAGE.encode(), 'text/html'
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ReplayHandler
+
+async def replay(base_url, max_posts):
+    scraper = XScraper(headless=True)
+    scraper.rate_limit_delay = 0
+    await scraper.init_browser()
+    try:
+        posts = await scraper.scrape_profile(f"{base_url}/replay_user", max_posts=max_posts)
+        stats = scraper.stats[f"{base_url}/replay_user"]
+        print(f"Scraped {len(posts)} posts via {stats.source} ({stats.stop_reason})")
+        for post in posts:
+            print(f"{post['id']}  {post['timestamp']}  {post['text'][:60]}")
+    finally:
+        await scraper.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded timeline payloads to XScraper")
+    parser.add_argument('--payload', '-p', default=DEFAULT_PAYLOAD,
+                       help='Recorded UserTweets JSON response')
+    parser.add_argument('--max-posts', '-n', type=int, default=30,
+                       help='Maximum posts to scrape')
+
+    args = parser.parse_args()
+    with open(args.payload) as f:
+        payload = json.load(f)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(payload))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        asyncio.run(replay(f"http://127.0.0.1:{server.server_port}", args.max_posts))
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Explain every registered query shape and flag the ones that scan a whole collection.
+Can be run inside Docker container: docker-compose exec web python scripts/verify_indexes.py --ensure
+"""
+
+import argparse
+import os
+import sys
+
+from pymongo import MongoClient
+from tabulate import tabulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from xscraper.indexes import ensure_indexes, verify_query_plans
+
+def main():
+    parser = argparse.ArgumentParser(description="Check query plans against the index registry")
+    parser.add_argument('--ensure', action='store_true',
+                       help='Create the registered indexes before checking')
+
+    args = parser.parse_args()
+
+    try:
+        client = MongoClient(os.getenv('MONGODB_URI', 'mongodb://mongodb:27017/xscraper'))
+        db = client.get_default_database()
+        if args.ensure:
+            print(f"Ensured {ensure_indexes(db)} indexes")
+
+        rows = []
+        scans = 0
+        for shape, stages in verify_query_plans(db):
+            collscan = 'COLLSCAN' in stages
+            scans += collscan
+            rows.append([shape.name, shape.collection, ' <- '.join(stages),
+                         'COLLSCAN' if collscan else 'ok', ', '.join(shape.used_by)])
+        print(tabulate(rows, headers=['Query', 'Collection', 'Plan', 'Status', 'Used by'], tablefmt='grid'))
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if scans:
+        print(f"{scans} queries scan a whole collection", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+from xscraper.api import serialize_document, profiles_etag, records_etag
+from xscraper.pagination import encode_cursor, decode_cursor
+
+def test_serialize_document():
+    profile_id = ObjectId()
+    document = serialize_document({'_id': profile_id, 'last_scraped': datetime(2024, 1, 1), 'url': 'https://x.com/a'})
+    assert document == {'_id': str(profile_id), 'last_scraped': '2024-01-01T00:00:00Z', 'url': 'https://x.com/a'}
+
+def test_etags_follow_last_scraped():
+    database = {'_id': ObjectId(), 'last_updated': datetime(2024, 1, 1)}
+    profile = {'_id': ObjectId(), 'last_scraped': datetime(2024, 1, 1), 'record_count': 5}
+    before_etags = profiles_etag(database, [profile]), records_etag(profile, limit=50)
+    assert before_etags == (profiles_etag(database, [dict(profile)]), records_etag(dict(profile), limit=50))
+
+    profile['last_scraped'] = datetime(2024, 1, 1, 6)
+    assert profiles_etag(database, [profile]) != before_etags[0]
+    assert records_etag(profile, limit=50) != before_etags[1]
+    assert records_etag(profile, after='abc', limit=50) != records_etag(profile, limit=50)
+
+def test_cursor_of_string_timestamp_keeps_position():
+    record = {'_id': ObjectId(), 'timestamp': '2024-01-02T10:00:00.000Z'}
+    timestamp, record_id = decode_cursor(encode_cursor(record))
+    assert timestamp is not None
+    assert timestamp.replace(tzinfo=None) == datetime(2024, 1, 2, 10, 0)
+    assert record_id == record['_id']
+
+def test_api_route_answers_matching_etag_with_304(monkeypatch):
+    # web_app connects to MongoDB on import, like in the docker-compose setup
+    uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/xscraper')
+    try:
+        MongoClient(uri, serverSelectionTimeoutMS=500).admin.command('ping')
+    except PyMongoError:
+        pytest.skip(f"MongoDB is not reachable at {uri}")
+    import web_app
+    databases = [{'_id': ObjectId(), 'name': 'CS2', 'slug': 'cs2', 'last_updated': datetime(2024, 1, 1)}]
+    monkeypatch.setattr(web_app, '_database_overview', lambda: databases)
+    client = web_app.app.test_client()
+
+    response = client.get('/api/v1/databases')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    revalidated = client.get('/api/v1/databases', headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+    assert revalidated.headers['ETag'] == etag
@@ -0,0 +1,26 @@
+from xscraper.cache import TTLCache
+
+def test_cache_counts_hits_and_evicts_oldest():
+    cache = TTLCache(ttl=60, max_entries=2)
+    assert cache.get_or_compute('a', lambda: 1) == 1
+    assert cache.get_or_compute('a', lambda: 2) == 1
+    cache.set('b', 2)
+    cache.set('c', 3)
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (1, 2, 1)
+
+def test_invalidate_discards_values_computed_before_it():
+    cache = TTLCache(ttl=60)
+
+    def compute():
+        cache.invalidate()  # a write lands while the view is computed
+        return 'stale'
+
+    assert cache.get_or_compute('overview', compute) == 'stale'
+    assert cache.get('overview') is None
+
+def test_expired_entries_miss():
+    cache = TTLCache(ttl=0)
+    cache.set('a', 1)
+    assert cache.get('a') is None
@@ -0,0 +1,20 @@
+from types import SimpleNamespace
+from xscraper.config import Config
+from scraper_daemon import ScraperDaemon
+
+def make_daemon():
+    scraper = SimpleNamespace(config=Config(mongodb_uri='mongodb://localhost:27017/test'))
+    return ScraperDaemon(scraper=scraper, db_manager=object())
+
+def test_dispatch_commands():
+    daemon = make_daemon()
+    assert daemon.dispatch('status')['state'] == 'idle'
+    assert daemon.dispatch('run') == {'ok': True, 'result': 'started'}
+    assert daemon._trigger.is_set()
+    assert daemon.dispatch('stop') == {'ok': True, 'result': 'stopping'}
+    assert daemon.dispatch('status')['state'] == 'stopping'
+
+def test_dispatch_unknown_command():
+    reply = make_daemon().dispatch('scrape')
+    assert reply['ok'] is False
+    assert 'run, status, stop' in reply['error']
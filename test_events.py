@@ -0,0 +1,41 @@
+import asyncio
+import threading
+from xscraper.events import EventBus, Subscription, current_job
+
+def test_full_subscription_drops_oldest_and_reports_count():
+    subscription = Subscription(max_queued=3)
+    for number in range(5):
+        subscription.put({'type': 'tweets_found', 'number': number})
+    assert subscription.get(timeout=0) == {'type': 'dropped', 'count': 2}
+    assert [subscription.get(timeout=0)['number'] for _ in range(3)] == [2, 3, 4]
+    assert subscription.get(timeout=0) is None
+
+def test_job_subscription_only_gets_its_job():
+    bus = EventBus()
+    subscription = bus.subscribe('job-1')
+
+    async def publish_for(job_id):
+        current_job.set(job_id)
+        bus.publish('profile_started', profile_url=job_id)
+
+    async def main():
+        await asyncio.gather(publish_for('job-1'), publish_for('job-2'))
+
+    asyncio.run(main())
+    bus.publish('profile_started', profile_url='untagged')
+    event = subscription.get(timeout=0)
+    assert event['job_id'] == 'job-1'
+    assert subscription.get(timeout=0) is None
+
+def test_aget_wakes_on_put_from_another_thread():
+    subscription = Subscription(max_queued=10)
+
+    async def main():
+        assert await subscription.aget(timeout=0.01) is None
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.01, lambda: threading.Thread(
+            target=subscription.put, args=({'type': 'profile_started'},)
+        ).start())
+        return await subscription.aget(timeout=5)
+
+    assert asyncio.run(main()) == {'type': 'profile_started'}
@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from bson import ObjectId
+from xscraper.jobs import job_progress, scrape_failure, profile_since_id, settle_since_id, JOB_QUEUED, JOB_RUNNING
+from xscraper.models import ScrapeStats
+
+def test_job_progress_eta():
+    started = datetime(2024, 1, 1, 12, 0, 0)
+    job = {
+        '_id': ObjectId(),
+        'status': JOB_RUNNING,
+        'profiles_total': 10,
+        'profiles_done': 4,
+        'posts_saved': 37,
+        'created_at': started,
+        'started_at': started
+    }
+    progress = job_progress(job, now=started + timedelta(seconds=80))
+    assert progress['eta_seconds'] == 120
+    assert progress['posts_saved'] == 37
+    assert progress['started_at'] == '2024-01-01T12:00:00Z'
+
+def test_job_progress_queued_has_no_eta():
+    job = {'_id': ObjectId(), 'status': JOB_QUEUED, 'profiles_total': 3, 'created_at': datetime.utcnow()}
+    progress = job_progress(job)
+    assert progress['eta_seconds'] is None
+    assert progress['profiles_done'] == 0
+
+def test_scrape_failure_classes():
+    assert scrape_failure(ScrapeStats('done', stop_reason='caught_up')) == ''
+    assert scrape_failure(ScrapeStats('cut_short', stop_reason='deadline', failure='timeout')) == 'timeout'
+    assert scrape_failure(ScrapeStats('suspended', failure='suspended')) == 'suspended'
+    assert scrape_failure(ScrapeStats('crashed')) == 'error'
+    assert scrape_failure(None) == 'error'
+
+def test_deadline_cut_scrape_keeps_since_id_until_a_scrape_completes():
+    kept, stored = {}, {'latest': '500'}
+    async def latest(database_id, profile_id):
+        return stored['latest']
+    async def set_pending(profile_id, since_id):
+        kept.setdefault(profile_id, since_id)
+    async def clear_pending(profile_id):
+        kept.pop(profile_id, None)
+    db_manager = SimpleNamespace(get_latest_tweet_id=latest, set_pending_since_id=set_pending,
+                                 clear_pending_since_id=clear_pending)
+    profile = {'_id': ObjectId(), 'database_id': ObjectId(), 'url': 'https://x.com/a'}
+
+    async def visit(stats):
+        since_id = await profile_since_id(db_manager, profile)
+        await settle_since_id(db_manager, stats, profile, since_id)
+        return since_id
+
+    async def check():
+        assert await visit(ScrapeStats(profile['url'], stop_reason='deadline', failure='timeout')) == '500'
+        # Newer posts were saved, but the next visits still scrape down to 500
+        stored['latest'] = '900'
+        assert await visit(ScrapeStats(profile['url'], stop_reason='deadline', failure='timeout')) == '500'
+        assert await visit(ScrapeStats(profile['url'], stop_reason='caught_up')) == '500'
+        assert 'pending_since_id' not in profile and kept == {}
+        assert await visit(ScrapeStats(profile['url'], stop_reason='caught_up')) == '900'
+
+    asyncio.run(check())
@@ -0,0 +1,57 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+from xscraper.async_db_manager import AsyncDBManager
+from xscraper.runs import ScrapeRun, RUN_RUNNING, RUN_ABANDONED, PROFILE_DONE, PROFILE_FAILED, PROFILE_RUNNING
+
+def test_remaining_skips_finished_profiles():
+    done, partial, failed, new = (ObjectId() for _ in range(4))
+    run = ScrapeRun(None, {'_id': ObjectId(), 'profiles': {
+        str(done): {'status': PROFILE_DONE, 'attempts': 1},
+        str(partial): {'status': PROFILE_RUNNING, 'attempts': 1, 'since_id': '100'},
+        str(failed): {'status': PROFILE_FAILED, 'attempts': 1}
+    }}, resumed=True)
+    profiles = [{'_id': profile_id} for profile_id in (done, partial, failed, new)]
+    assert [profile['_id'] for profile in run.remaining(profiles)] == [partial, failed, new]
+    assert run.summary() == {PROFILE_DONE: 1, PROFILE_RUNNING: 1, PROFILE_FAILED: 1}
+
+def test_failed_filters_by_failure_class():
+    timed_out, suspended = ObjectId(), ObjectId()
+    run = ScrapeRun(None, {'_id': ObjectId(), 'profiles': {
+        str(timed_out): {'status': PROFILE_FAILED, 'attempts': 1, 'failure': 'timeout'},
+        str(suspended): {'status': PROFILE_FAILED, 'attempts': 1, 'failure': 'suspended'}
+    }})
+    profiles = [{'_id': timed_out}, {'_id': suspended}]
+    assert run.failed(profiles, ('timeout', 'error')) == [{'_id': timed_out}]
+
+def test_resume_only_recent_runs():
+    uri = os.getenv('MONGODB_TEST_URI', 'mongodb://localhost:27017/xscraper_test')
+    try:
+        MongoClient(uri, serverSelectionTimeoutMS=500).admin.command('ping')
+    except PyMongoError:
+        pytest.skip(f"MongoDB is not reachable at {uri}")
+
+    async def check():
+        db_manager = AsyncDBManager(uri)
+        await db_manager.connect()
+        runs = db_manager.db.scrape_runs
+        await runs.delete_many({})
+        profiles = [{'_id': ObjectId()}]
+        try:
+            stale = await runs.insert_one({'status': RUN_RUNNING, 'started_at': datetime.utcnow() - timedelta(days=2),
+                                           'profiles': {}})
+            run = await ScrapeRun.resume_or_start(db_manager, profiles, max_age=timedelta(hours=6))
+            assert not run.resumed
+            assert (await runs.find_one({'_id': stale.inserted_id}))['status'] == RUN_ABANDONED
+
+            resumed = await ScrapeRun.resume_or_start(db_manager, profiles, max_age=timedelta(hours=6))
+            assert resumed.resumed and resumed.id == run.id
+        finally:
+            await runs.delete_many({})
+            db_manager.close()
+
+    asyncio.run(check())
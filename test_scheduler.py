@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+from bson import ObjectId
+from xscraper.config import Config
+from xscraper.scheduler import AdaptiveScheduler, next_interval
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+def make_config(**overrides):
+    return Config(mongodb_uri='mongodb://localhost/test', **overrides)
+
+def test_next_interval_follows_posting_rate():
+    config = make_config(schedule_target_posts=5, schedule_min_interval=30, schedule_max_interval=2880)
+    assert next_interval(1.0, config) == timedelta(hours=5)
+    assert next_interval(100.0, config) == timedelta(minutes=30)
+    assert next_interval(0.0, config) == timedelta(minutes=2880)
+    assert next_interval(1.0, config, saturated=True) == timedelta(minutes=30)
+
+def test_take_due_respects_budget_and_order():
+    scheduler = AdaptiveScheduler(make_config(scrape_budget_per_hour=24))  # holds 2 visits
+    profiles = [
+        {'_id': ObjectId(), 'next_scrape_at': NOW - timedelta(hours=hours)}
+        for hours in (1, 3, 2)
+    ] + [{'_id': ObjectId(), 'next_scrape_at': NOW + timedelta(hours=1)}]
+    scheduler.load(profiles, NOW)
+
+    due = scheduler.take_due(NOW)
+    assert [p['_id'] for p in due] == [profiles[1]['_id'], profiles[2]['_id']]
+    assert scheduler.take_due(NOW) == []
+    assert scheduler.seconds_until_next(NOW) == 150
+    assert [p['_id'] for p in scheduler.take_due(NOW + timedelta(minutes=3))] == [profiles[0]['_id']]
+
+def test_reschedule_updates_rate():
+    scheduler = AdaptiveScheduler(make_config(schedule_target_posts=5))
+    profile = {'_id': ObjectId(), 'last_scraped': NOW - timedelta(hours=10), 'post_rate': 0.5}
+    scheduler.load([profile], NOW)
+    scheduler.take_due(NOW)
+
+    update = scheduler.reschedule(profile, 20, NOW)
+    assert update['post_rate'] == 1.25
+    assert update['next_scrape_at'] == NOW + timedelta(hours=4)
+    assert scheduler.seconds_until_next(NOW) == 4 * 3600
+
+    failed = scheduler.reschedule(profile, None, NOW)
+    assert failed['post_rate'] == 1.25
+    assert failed['next_scrape_at'] == NOW + timedelta(minutes=30)
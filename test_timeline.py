@@ -0,0 +1,41 @@
+import json
+import os
+from datetime import datetime, timezone
+
+from xscraper.timeline import is_timeline_response, parse_timeline_payload
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'scripts', 'fixtures', 'user_tweets.json')
+
+def load_payload():
+    with open(FIXTURE) as f:
+        return json.load(f)
+
+def test_is_timeline_response():
+    assert is_timeline_response('https://x.com/i/api/graphql/V7H0Ap3_Hh2FyS75OCDO3Q/UserTweets?variables=%7B%7D')
+    assert is_timeline_response('https://x.com/i/api/graphql/abc/UserTweetsAndReplies')
+    assert not is_timeline_response('https://x.com/i/api/graphql/abc/UserByScreenName?variables=%7B%7D')
+    assert not is_timeline_response('https://pbs.twimg.com/media/UserTweets.jpg')
+
+def test_parse_timeline_payload():
+    tweets = parse_timeline_payload(load_payload())
+
+    # Pinned entry first, then timeline order, cursors skipped
+    assert [t['id'] for t in tweets] == [
+        '1600000000000000001',
+        '1750000000000000003',
+        '1750000000000000002',
+        '1750000000000000001',
+    ]
+    assert tweets[1]['created_at'] == datetime(2024, 2, 19, 18, 30, tzinfo=timezone.utc)
+    assert tweets[1]['author'] == 'replay_user'
+    assert tweets[1]['url'] == 'https://x.com/replay_user/status/1750000000000000003'
+
+def test_parse_timeline_payload_full_text():
+    tweets = {t['id']: t for t in parse_timeline_payload(load_payload())}
+
+    # Visibility-wrapped long tweet keeps its note_tweet text
+    assert tweets['1750000000000000002']['text'] == 'A long tweet whose full text only lives in note_tweet'
+
+def test_parse_timeline_payload_unknown_shape():
+    assert parse_timeline_payload({'data': {}}) == []
+    assert parse_timeline_payload({'errors': [{'message': 'Rate limit exceeded'}]}) == []
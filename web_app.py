@@ -1,12 +1,22 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify
 from flask_pymongo import PyMongo
 from bson import ObjectId
 import os
 import logging
-import asyncio
-from datetime import datetime
-from xscraper.scraper import XScraper
-from xscraper.utils import normalize_x_url, is_valid_x_url
+import threading
+from xscraper.db_manager import DBManager, migrate_string_timestamps, string_timestamps_migrated
+from xscraper.stats import database_overview, counters_missing, reconcile_counters
+from xscraper.pagination import paginate_records
+from xscraper.indexes import ensure_indexes
+from xscraper.jobs import JobQueue, job_progress
+from xscraper.events import scrape_events, format_sse
+from xscraper.cache import TTLCache
+from xscraper.api import API_PREFIX, serialize_document, databases_etag, profiles_etag
+from xscraper.views import (
+    FLASH, SSE_HEADERS, scrape_queued_flash, profile_toggled_flash, database_form, profile_form, database_view,
+    records_filter, records_page_args, records_page_etag, profile_etag, databases_payload, database_payload,
+    profiles_payload, records_payload, job_finished, ends_job_stream
+)
 
 # Setup logging
 logging.basicConfig(
@@ -33,31 +43,14 @@ except Exception as e:
     logger.error(f"Failed to connect to MongoDB: {e}")
     raise
 
-def _parse_timestamp(timestamp_str: str) -> datetime:
-    """Safely parse ISO format timestamp string"""
-    try:
-        # Remove any existing timezone info and replace with UTC
-        clean_ts = timestamp_str.split('+')[0].rstrip('Z')
-        if not clean_ts.endswith('.'):  # Ensure we don't have a trailing dot
-            clean_ts = clean_ts.rstrip('.')
-        return datetime.fromisoformat(clean_ts + '+00:00')
-    except Exception as e:
-        logger.error(f"Error parsing timestamp {timestamp_str}: {e}")
-        return datetime.utcnow()
-
-def _process_post(post: dict, profile: dict, database_id: str) -> dict:
-    """Process a post before saving to database"""
-    processed = post.copy()
-    processed['database_id'] = database_id
-    processed['profile_id'] = profile['_id']
-    processed['profile_url'] = profile['url']
-    processed['last_updated'] = datetime.utcnow()
-    
-    # Convert timestamp string to datetime
-    if 'timestamp' in processed and isinstance(processed['timestamp'], str):
-        processed['timestamp'] = _parse_timestamp(processed['timestamp'])
-        
-    return processed
+# Dashboard data, invalidated by every write through db_manager
+view_cache = TTLCache(
+    ttl=float(os.getenv("VIEW_CACHE_TTL", "30")),
+    max_entries=int(os.getenv("VIEW_CACHE_MAX_ENTRIES", "128"))
+)
+
+db_manager = DBManager(app.config["MONGO_URI"], cache=view_cache)
+db_manager.connect()
 
 def init_db():
     """Initialize database collections and indexes"""
@@ -65,26 +58,29 @@ def init_db():
         logger.info("Starting database initialization...")
         
         # Create indexes
-        mongo.db.game_databases.create_index('slug', unique=True)
-        mongo.db.profiles.create_index([('database_id', 1), ('url', 1)], unique=True)
-        mongo.db.scraped_data.create_index([('database_id', 1), ('profile_id', 1), ('id', 1)], unique=True)
-        logger.info("Created indexes")
+        ensured = ensure_indexes(mongo.db)
+        logger.info(f"Ensured {ensured} indexes")
         
         # Create default database if none exists
         default_db = mongo.db.game_databases.find_one({'slug': 'cs2'})
         if not default_db:
-            try:
-                result = mongo.db.game_databases.insert_one({
-                    'name': 'Counter Strike 2',
-                    'slug': 'cs2',
-                    'created_at': datetime.utcnow(),
-                    'last_updated': None
-                })
-                logger.info(f"Created default CS2 database with ID: {result.inserted_id}")
-            except Exception as e:
-                logger.warning(f"Could not create default database: {e}")
+            if db_manager.add_database('Counter Strike 2', 'cs2'):
+                logger.info("Created default CS2 database")
+            else:
+                logger.warning("Could not create default database")
         else:
             logger.info("Default database already exists")
+        
+        # Older runs stored record timestamps as strings, which keyset pages skip;
+        # the conversion scans scraped_data, so it only runs until it completed once
+        if not string_timestamps_migrated(mongo.db):
+            converted = migrate_string_timestamps(mongo.db)
+            logger.info(f"Converted {converted} string timestamps to dates")
+        
+        # Backfill record and profile counters for data that predates them
+        if counters_missing(mongo.db):
+            fixed = reconcile_counters(mongo.db)
+            logger.info(f"Initialized counters on {fixed} documents")
             
         return True
     except Exception as e:
@@ -95,129 +91,65 @@ def init_db():
 with app.app_context():
     init_db()
 
-async def _initialize_scraper(headless=True):
-    """Helper function to safely initialize scraper with proper error handling"""
-    scraper = None
-    try:
-        scraper = XScraper(headless=headless)
-        await scraper.init_browser()
-        return scraper
-    except Exception as e:
-        if scraper:
-            try:
-                await scraper.close()
-            except:
-                pass
-        raise
-
-async def _safe_scrape_profile(scraper, profile_url, max_posts=30):
-    """Helper function to safely scrape a profile and handle errors"""
-    try:
-        return await scraper.scrape_profile(profile_url, max_posts=max_posts)
-    except Exception as e:
-        logger.error(f"Error scraping profile {profile_url}: {str(e)}")
-        return []
+# Scrapes run on a background worker, outside the request handlers
+job_queue = JobQueue(
+    mongo.db,
+    app.config["MONGO_URI"],
+    max_posts=int(os.getenv("POSTS_LIMIT", "30")),
+    cache=view_cache
+)
+job_queue.start()
+
+def _database_overview():
+    """All databases with their counters, served from the view cache"""
+    return view_cache.get_or_compute(('overview',), lambda: database_overview(mongo.db))
+
+def _database_profiles(slug):
+    """Database page context, served from the view cache; None if the slug is unknown"""
+    def compute():
+        database = mongo.db.game_databases.find_one({'slug': slug})
+        if not database:
+            return None
+        return database_view(database, list(mongo.db.profiles.find({'database_id': database['_id']})))
+    return view_cache.get_or_compute(('database', slug), compute)
+
+def _records_page(database, profile, page):
+    """Fetch a records page, raises ValueError on a bad page token"""
+    return paginate_records(mongo.db.scraped_data, records_filter(database, profile), **page)
 
 @app.route('/')
 def index():
     try:
-        databases = list(mongo.db.game_databases.find())
-        stats = []
-        for db in databases:
-            record_count = mongo.db.scraped_data.count_documents({'database_id': db['_id']})
-            profile_count = mongo.db.profiles.count_documents({'database_id': db['_id']})
-            stats.append({
-                'name': db['name'],
-                'slug': db['slug'],
-                'record_count': record_count,
-                'profile_count': profile_count,
-                'last_updated': db.get('last_updated')
-            })
+        stats = _database_overview()
         return render_template('index.html', databases=stats)
     except Exception as e:
         logger.error(f"Index error: {str(e)}", exc_info=True)
-        flash('An error occurred while loading the dashboard', 'danger')
+        flash(*FLASH['dashboard_error'])
         return render_template('index.html', databases=[])
 
+@app.route('/cache/stats')
+def cache_stats():
+    """Hit and miss counters of the view cache"""
+    return jsonify(view_cache.stats())
+
 @app.route('/scrape_all', methods=['POST'])
 def scrape_all():
-    """Scrape all active profiles across all databases"""
+    """Queue a scrape of all active profiles across all databases"""
     try:
-        total_profiles = 0
-        total_posts = 0
-        updated_dbs = set()
-        scraper = None
-        
         # Get all active profiles across all databases
         profiles = list(mongo.db.profiles.find({'active': True}))
         
         if not profiles:
-            flash('No active profiles found', 'warning')
+            flash(*FLASH['no_active_profiles'])
             return redirect(url_for('index'))
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            # Initialize scraper
-            scraper = loop.run_until_complete(_initialize_scraper(headless=True))
-            
-            for profile in profiles:
-                # Scrape posts
-                posts = loop.run_until_complete(_safe_scrape_profile(scraper, profile['url']))
-                logger.info(f"Scraped {len(posts)} posts from {profile['url']}")
-                
-                if posts:
-                    # Store each post
-                    for post in posts:
-                        processed_post = _process_post(post, profile, profile['database_id'])
-                        # Update or insert post
-                        mongo.db.scraped_data.update_one(
-                            {
-                                'database_id': profile['database_id'],
-                                'profile_id': profile['_id'],
-                                'id': processed_post['id']
-                            },
-                            {'$set': processed_post},
-                            upsert=True
-                        )
-                    
-                    total_posts += len(posts)
-                    total_profiles += 1
-                    updated_dbs.add(profile['database_id'])
-                    
-                    # Update profile's last scraped time
-                    mongo.db.profiles.update_one(
-                        {'_id': profile['_id']},
-                        {
-                            '$set': {
-                                'last_scraped': datetime.utcnow(),
-                                'last_scrape_count': len(posts)
-                            }
-                        }
-                    )
-            
-            # Update last_updated for all affected databases
-            now = datetime.utcnow()
-            for db_id in updated_dbs:
-                mongo.db.game_databases.update_one(
-                    {'_id': db_id},
-                    {'$set': {'last_updated': now}}
-                )
-            
-            flash(f'Successfully scraped {total_posts} posts from {total_profiles} profiles across {len(updated_dbs)} databases', 'success')
-            
-        finally:
-            if scraper:
-                try:
-                    loop.run_until_complete(scraper.close())
-                except:
-                    pass
-            loop.close()
+        job_id = job_queue.submit(profiles)
+        flash(*scrape_queued_flash(profiles))
+        return redirect(url_for('index', job=str(job_id)))
         
     except Exception as e:
         logger.error(f"Scrape all error: {str(e)}", exc_info=True)
-        flash('An error occurred while scraping profiles', 'danger')
+        flash(*FLASH['scrape_error'])
     
     return redirect(url_for('index'))
 
@@ -233,83 +165,45 @@ def databases():
                 if slug:
                     db = mongo.db.game_databases.find_one({'slug': slug})
                     if db:
-                        mongo.db.profiles.delete_many({'database_id': db['_id']})
-                        mongo.db.scraped_data.delete_many({'database_id': db['_id']})
-                        mongo.db.game_databases.delete_one({'_id': db['_id']})
-                        flash('Database deleted successfully', 'success')
+                        db_manager.delete_database(slug)
+                        flash(*FLASH['database_deleted'])
                     else:
-                        flash('Database not found', 'danger')
+                        flash(*FLASH['database_not_found'])
             else:
                 # Handle database creation
-                name = request.form.get('name')
-                slug = request.form.get('slug')
-                
-                if not name or not slug:
-                    flash('Name and slug are required', 'danger')
+                name, slug, error = database_form(request.form)
+                if error:
+                    flash(*FLASH[error])
+                elif db_manager.add_database(name, slug):
+                    flash(*FLASH['database_added'])
                 else:
-                    try:
-                        mongo.db.game_databases.insert_one({
-                            'name': name,
-                            'slug': slug,
-                            'created_at': datetime.utcnow(),
-                            'last_updated': None
-                        })
-                        flash('Database added successfully', 'success')
-                    except Exception as e:
-                        logger.error(f"Error adding database: {e}")
-                        flash('A database with this slug already exists', 'danger')
+                    logger.error(f"Error adding database {slug}")
+                    flash(*FLASH['database_exists'])
             
             return redirect(url_for('databases'))
         
         # GET request - show databases
-        databases = list(mongo.db.game_databases.find())
-        logger.debug(f"Found {len(databases)} databases")
-        
-        db_list = []
-        for db in databases:
-            record_count = mongo.db.scraped_data.count_documents({'database_id': db['_id']})
-            profile_count = mongo.db.profiles.count_documents({'database_id': db['_id']})
-            db_list.append({
-                '_id': db['_id'],
-                'name': db['name'],
-                'slug': db['slug'],
-                'record_count': record_count,
-                'profile_count': profile_count,
-                'last_updated': db.get('last_updated')
-            })
+        db_list = _database_overview()
+        logger.debug(f"Found {len(db_list)} databases")
             
         return render_template('databases.html', databases=db_list)
     except Exception as e:
         logger.error(f"Databases error: {str(e)}", exc_info=True)
-        flash('An error occurred while loading databases', 'danger')
+        flash(*FLASH['databases_error'])
         return render_template('databases.html', databases=[])
 
 @app.route('/databases/<slug>')
 def view_database(slug):
     try:
-        database = mongo.db.game_databases.find_one({'slug': slug})
-        if not database:
-            flash('Database not found', 'danger')
+        view = _database_profiles(slug)
+        if not view:
+            flash(*FLASH['database_not_found'])
             return redirect(url_for('databases'))
         
-        profiles = list(mongo.db.profiles.find({'database_id': database['_id']}))
-        active_profiles = sum(1 for p in profiles if p.get('active', True))
-        total_records = mongo.db.scraped_data.count_documents({'database_id': database['_id']})
-        
-        for profile in profiles:
-            profile['record_count'] = mongo.db.scraped_data.count_documents({
-                'database_id': database['_id'],
-                'profile_id': profile['_id']
-            })
-        
-        return render_template('profiles.html',
-                           database=database,
-                           profiles=profiles,
-                           active_profiles=active_profiles,
-                           total_records=total_records)
+        return render_template('profiles.html', **view)
     except Exception as e:
         logger.error(f"View database error: {str(e)}", exc_info=True)
-        flash('An error occurred while loading the database', 'danger')
+        flash(*FLASH['database_error'])
         return redirect(url_for('databases'))
 
 @app.route('/databases/<slug>/profiles/<profile_id>/records')
@@ -317,49 +211,114 @@ def view_profile_records(slug, profile_id):
     try:
         database = mongo.db.game_databases.find_one({'slug': slug})
         if not database:
-            flash('Database not found', 'danger')
+            flash(*FLASH['database_not_found'])
             return redirect(url_for('databases'))
             
         profile = mongo.db.profiles.find_one({'_id': ObjectId(profile_id)})
         if not profile:
-            flash('Profile not found', 'danger')
+            flash(*FLASH['profile_not_found'])
             return redirect(url_for('view_database', slug=slug))
             
-        records = list(mongo.db.scraped_data.find({
-            'database_id': database['_id'],
-            'profile_id': ObjectId(profile_id)
-        }).sort('timestamp', -1))  # Sort by timestamp descending
+        page = records_page_args(request.args)
+        try:
+            records, next_token, prev_token = _records_page(database, profile, page)
+        except ValueError:
+            flash(*FLASH['invalid_page'])
+            return redirect(url_for('view_profile_records', slug=slug, profile_id=profile_id))
         
-        logger.info(f"Found {len(records)} records for profile {profile['url']}")
+        logger.info(f"Showing {len(records)} records for profile {profile['url']}")
         
         return render_template('records.html',
                            database=database,
                            profile=profile,
-                           records=records)
+                           records=records,
+                           limit=page['limit'],
+                           next_token=next_token,
+                           prev_token=prev_token)
     except Exception as e:
         logger.error(f"View records error: {str(e)}", exc_info=True)
-        flash('An error occurred while loading the records', 'danger')
+        flash(*FLASH['records_error'])
         return redirect(url_for('view_database', slug=slug))
 
+def _conditional_json(etag: str, build):
+    """JSON response validated by ETag; build() only runs when the client copy is stale"""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    # Clients may keep the response but must revalidate before using it
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _api_profile(slug, profile_id):
+    """Database and profile documents for an API route, or (None, None)"""
+    database = mongo.db.game_databases.find_one({'slug': slug})
+    if not database or not ObjectId.is_valid(profile_id):
+        return None, None
+    profile = mongo.db.profiles.find_one({'_id': ObjectId(profile_id), 'database_id': database['_id']})
+    return (database, profile) if profile else (None, None)
+
+@app.route(f'{API_PREFIX}/databases')
+def api_databases():
+    """JSON list of game databases with their counters"""
+    databases = _database_overview()
+    return _conditional_json(databases_etag(databases), lambda: databases_payload(databases))
+
+@app.route(f'{API_PREFIX}/databases/<slug>')
+def api_database(slug):
+    """JSON game database"""
+    view = _database_profiles(slug)
+    if not view:
+        return jsonify({'error': 'Not found'}), 404
+    return _conditional_json(profiles_etag(view['database'], view['profiles']), lambda: database_payload(view))
+
+@app.route(f'{API_PREFIX}/databases/<slug>/profiles')
+def api_profiles(slug):
+    """JSON profiles of a game database"""
+    view = _database_profiles(slug)
+    if not view:
+        return jsonify({'error': 'Not found'}), 404
+    return _conditional_json(profiles_etag(view['database'], view['profiles']), lambda: profiles_payload(view))
+
+@app.route(f'{API_PREFIX}/databases/<slug>/profiles/<profile_id>')
+def api_profile(slug, profile_id):
+    """JSON profile"""
+    database, profile = _api_profile(slug, profile_id)
+    if not profile:
+        return jsonify({'error': 'Not found'}), 404
+    return _conditional_json(profile_etag(profile), lambda: serialize_document(profile))
+
+@app.route(f'{API_PREFIX}/databases/<slug>/profiles/<profile_id>/records')
+def api_profile_records(slug, profile_id):
+    """JSON records of a profile, newest first, with keyset page tokens"""
+    database, profile = _api_profile(slug, profile_id)
+    if not profile:
+        return jsonify({'error': 'Not found'}), 404
+        
+    page = records_page_args(request.args)
+    etag = records_page_etag(profile, page)
+    if request.if_none_match.contains(etag):
+        return _conditional_json(etag, None)
+        
+    try:
+        records, next_token, prev_token = _records_page(database, profile, page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+        
+    return _conditional_json(etag, lambda: records_payload(records, page['limit'], next_token, prev_token))
+
 @app.route('/databases/<slug>/profiles/add', methods=['POST'])
 def add_profile(slug):
     try:
         database = mongo.db.game_databases.find_one({'slug': slug})
         if not database:
-            flash('Database not found', 'danger')
+            flash(*FLASH['database_not_found'])
             return redirect(url_for('databases'))
         
-        url = request.form.get('profile_url')
-        description = request.form.get('description', '')
-        
-        if not url:
-            flash('Profile URL is required', 'danger')
-            return redirect(url_for('view_database', slug=slug))
-        
-        # Normalize and validate the URL
-        normalized_url = normalize_x_url(url)
-        if not is_valid_x_url(normalized_url):
-            flash('Invalid X/Twitter profile URL', 'danger')
+        normalized_url, description, error = profile_form(request.form)
+        if error:
+            flash(*FLASH[error])
             return redirect(url_for('view_database', slug=slug))
         
         # Check if profile already exists
@@ -369,33 +328,25 @@ def add_profile(slug):
         })
         
         if existing_profile:
-            flash('Profile already exists in this database', 'warning')
+            flash(*FLASH['profile_exists'])
+        elif db_manager.add_profile(database['_id'], normalized_url, description):
+            flash(*FLASH['profile_added'])
         else:
-            new_profile = {
-                'database_id': database['_id'],
-                'url': normalized_url,
-                'description': description,
-                'active': True,
-                'added_at': datetime.utcnow(),
-                'last_scraped': None,
-                'record_count': 0
-            }
-            mongo.db.profiles.insert_one(new_profile)
-            flash('Profile added successfully', 'success')
+            flash(*FLASH['profile_add_error'])
         
         return redirect(url_for('view_database', slug=slug))
     except Exception as e:
         logger.error(f"Add profile error: {str(e)}", exc_info=True)
-        flash('An error occurred while adding the profile', 'danger')
+        flash(*FLASH['profile_add_error'])
         return redirect(url_for('view_database', slug=slug))
 
 @app.route('/databases/<slug>/profiles/scrape', methods=['POST'])
 def scrape_profiles(slug):
-    """Scrape all active profiles in a database"""
+    """Queue a scrape of all active profiles in a database"""
     try:
         database = mongo.db.game_databases.find_one({'slug': slug})
         if not database:
-            flash('Database not found', 'danger')
+            flash(*FLASH['database_not_found'])
             return redirect(url_for('databases'))
         
         # Get all active profiles
@@ -405,92 +356,72 @@ def scrape_profiles(slug):
         }))
         
         if not profiles:
-            flash('No active profiles found', 'warning')
+            flash(*FLASH['no_active_profiles'])
             return redirect(url_for('view_database', slug=slug))
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            # Initialize scraper
-            scraper = loop.run_until_complete(_initialize_scraper(headless=True))
-            total_scraped = 0
-            
-            for profile in profiles:
-                # Scrape posts
-                posts = loop.run_until_complete(_safe_scrape_profile(scraper, profile['url']))
-                logger.info(f"Scraped {len(posts)} posts from {profile['url']}")
-                
-                if posts:
-                    # Store each post
-                    for post in posts:
-                        processed_post = _process_post(post, profile, database['_id'])
-                        # Update or insert post
-                        mongo.db.scraped_data.update_one(
-                            {
-                                'database_id': database['_id'],
-                                'profile_id': profile['_id'],
-                                'id': processed_post['id']
-                            },
-                            {'$set': processed_post},
-                            upsert=True
-                        )
-                    
-                    total_scraped += len(posts)
-                    
-                    # Update profile's last scraped time
-                    mongo.db.profiles.update_one(
-                        {'_id': profile['_id']},
-                        {
-                            '$set': {
-                                'last_scraped': datetime.utcnow(),
-                                'last_scrape_count': len(posts)
-                            }
-                        }
-                    )
-            
-            # Update database's last updated time
-            mongo.db.game_databases.update_one(
-                {'_id': database['_id']},
-                {'$set': {'last_updated': datetime.utcnow()}}
-            )
-            
-            flash(f'Successfully scraped {total_scraped} posts from {len(profiles)} profiles', 'success')
-            
-        finally:
-            if scraper:
-                try:
-                    loop.run_until_complete(scraper.close())
-                except:
-                    pass
-            loop.close()
+        job_id = job_queue.submit(profiles, database_id=database['_id'])
+        flash(*scrape_queued_flash(profiles))
+        return redirect(url_for('view_database', slug=slug, job=str(job_id)))
         
     except Exception as e:
         logger.error(f"Scrape profiles error: {str(e)}", exc_info=True)
-        flash('An error occurred while scraping profiles', 'danger')
+        flash(*FLASH['scrape_error'])
     
     return redirect(url_for('view_database', slug=slug))
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """JSON progress of a scrape job"""
+    job = job_queue.get_job(ObjectId(job_id)) if ObjectId.is_valid(job_id) else None
+    if not job:
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify(job_progress(job))
+
+# Each open event stream holds a worker thread for as long as the client
+# stays connected, so only this many are served at once
+event_streams = threading.BoundedSemaphore(int(os.getenv("MAX_EVENT_STREAMS", "8")))
+
+@app.route('/events')
+def scrape_event_stream():
+    """Server-sent events with live scrape progress, of one job with ?job=<id>
+
+    A job's stream ends when the job finishes; 204 tells the browser not
+    to reconnect to a finished job, 503 that all streams are taken.
+    """
+    job_id = request.args.get('job')
+    if job_id and job_finished(job_queue.get_job(ObjectId(job_id)) if ObjectId.is_valid(job_id) else None):
+        return Response(status=204)
+    if not event_streams.acquire(blocking=False):
+        return Response('Too many event streams', status=503)
+    subscription = scrape_events.subscribe(job_id)
+    
+    def stream():
+        try:
+            while True:
+                event = subscription.get(timeout=15)
+                # Comment lines keep proxies from closing an idle stream
+                yield format_sse(event) if event else ': keepalive\n\n'
+                if event and ends_job_stream(event, job_id):
+                    break
+        finally:
+            scrape_events.unsubscribe(subscription)
+            event_streams.release()
+    
+    return Response(stream(), mimetype='text/event-stream', headers=SSE_HEADERS)
+
 @app.route('/databases/<slug>/profiles/<profile_id>/toggle', methods=['POST'])
 def toggle_profile(slug, profile_id):
     try:
-        profile = mongo.db.profiles.find_one({'_id': ObjectId(profile_id)})
-        if not profile:
-            flash('Profile not found', 'danger')
+        new_status = db_manager.toggle_profile(ObjectId(profile_id))
+        if new_status is None:
+            flash(*FLASH['profile_not_found'])
             return redirect(url_for('view_database', slug=slug))
         
-        new_status = not profile.get('active', True)
-        mongo.db.profiles.update_one(
-            {'_id': ObjectId(profile_id)},
-            {'$set': {'active': new_status}}
-        )
-        
-        status_text = 'activated' if new_status else 'deactivated'
-        flash(f'Profile {status_text} successfully', 'success')
+        flash(*profile_toggled_flash(new_status))
         return redirect(url_for('view_database', slug=slug))
     except Exception as e:
         logger.error(f"Toggle profile error: {str(e)}", exc_info=True)
-        flash('An error occurred while toggling the profile', 'danger')
+        flash(*FLASH['profile_toggle_error'])
         return redirect(url_for('view_database', slug=slug))
 
 @app.route('/databases/<slug>/profiles/<profile_id>/delete', methods=['POST'])
@@ -498,28 +429,25 @@ def delete_profile(slug, profile_id):
     try:
         database = mongo.db.game_databases.find_one({'slug': slug})
         if not database:
-            flash('Database not found', 'danger')
+            flash(*FLASH['database_not_found'])
             return redirect(url_for('databases'))
 
-        profile = mongo.db.profiles.find_one({'_id': ObjectId(profile_id)})
+        profile = mongo.db.profiles.find_one({
+            '_id': ObjectId(profile_id),
+            'database_id': database['_id']
+        })
         if not profile:
-            flash('Profile not found', 'danger')
+            flash(*FLASH['profile_not_found'])
             return redirect(url_for('view_database', slug=slug))
 
-        # Delete profile's scraped data
-        mongo.db.scraped_data.delete_many({
-            'database_id': database['_id'],
-            'profile_id': ObjectId(profile_id)
-        })
-
-        # Delete the profile
-        mongo.db.profiles.delete_one({'_id': ObjectId(profile_id)})
+        # Delete the profile and its scraped data, keeping counters in sync
+        db_manager.delete_profile(profile['_id'])
 
-        flash('Profile deleted successfully', 'success')
+        flash(*FLASH['profile_deleted'])
         return redirect(url_for('view_database', slug=slug))
     except Exception as e:
         logger.error(f"Delete profile error: {str(e)}", exc_info=True)
-        flash('An error occurred while deleting the profile', 'danger')
+        flash(*FLASH['profile_delete_error'])
         return redirect(url_for('view_database', slug=slug))
 
 if __name__ == '__main__':
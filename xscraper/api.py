@@ -0,0 +1,48 @@
+import hashlib
+from datetime import datetime
+from typing import Dict, List
+from bson import ObjectId
+
+API_PREFIX = '/api/v1'
+
+def serialize_document(document: Dict) -> Dict:
+    """Make a Mongo document JSON serializable"""
+    serialized = {}
+    for key, value in document.items():
+        if isinstance(value, ObjectId):
+            value = str(value)
+        elif isinstance(value, datetime):
+            value = value.isoformat() + 'Z'
+        elif isinstance(value, list):
+            value = [str(item) if isinstance(item, ObjectId) else item for item in value]
+        serialized[key] = value
+    return serialized
+
+def make_etag(*parts) -> str:
+    """Stable ETag over the values that decide a response's content"""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+def databases_etag(databases: List[Dict]) -> str:
+    """ETag of the database list, changes with last_updated or any counter"""
+    return make_etag(*(
+        (str(db['_id']), db.get('last_updated'), db.get('profile_count'),
+         db.get('active_profiles'), db.get('record_count'))
+        for db in databases
+    ))
+
+def profiles_etag(database: Dict, profiles: List[Dict]) -> str:
+    """ETag of a database's profiles, changes with last_scraped, status or counts"""
+    return make_etag(
+        database.get('last_updated'),
+        *((str(p['_id']), p.get('last_scraped'), p.get('active', True), p.get('record_count'))
+          for p in profiles)
+    )
+
+def records_etag(profile: Dict, after: str = None, before: str = None, limit: int = None) -> str:
+    """ETag of a page of a profile's records
+
+    Records only change when the profile is scraped, which always sets
+    last_scraped, so the page can be validated without querying it.
+    """
+    return make_etag(str(profile['_id']), profile.get('last_scraped'), profile.get('record_count'),
+                     after, before, limit)
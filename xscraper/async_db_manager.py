@@ -0,0 +1,294 @@
+from datetime import datetime
+from typing import List, Tuple, Dict, Optional
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DESCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError
+from bson import ObjectId
+from .models import Tweet
+from .indexes import ensure_indexes_async
+from .cache import TTLCache
+from .stats import overview_entry
+from .db_manager import (
+    NUMERIC_COLLATION, TOGGLE_ACTIVE_UPDATE, build_post_upserts, bulk_write_error_counts, record_counter_updates,
+    tweet_documents
+)
+
+class AsyncDBManager:
+    """Manages database operations without blocking the event loop
+
+    Mirrors DBManager on top of motor, so Mongo writes can run while
+    Playwright pages keep scraping on the same loop.
+    """
+
+    def __init__(self, uri: str, cache: Optional[TTLCache] = None):
+        self.uri = uri
+        self.client = None
+        self.db = None
+        self.cache = cache  # invalidated after every write
+
+    async def connect(self) -> bool:
+        """Connect to MongoDB"""
+        try:
+            self.client = AsyncIOMotorClient(self.uri)
+            self.db = self.client.get_database()
+            await self.client.admin.command('ping')
+            return True
+        except Exception as e:
+            print(f"Failed to connect to MongoDB: {e}")
+            return False
+
+    def close(self):
+        """Close MongoDB connection"""
+        if self.client:
+            self.client.close()
+
+    def _invalidate(self):
+        if self.cache:
+            self.cache.invalidate()
+
+    async def ensure_indexes(self) -> int:
+        """Create every index from the registry, returns the number ensured"""
+        return await ensure_indexes_async(self.db)
+
+    # Database Management
+    async def get_all_databases(self) -> List[Dict]:
+        """Get all game databases with their stats"""
+        try:
+            return [overview_entry(database) async for database in self.db.game_databases.find()]
+        except Exception as e:
+            print(f"Failed to get databases: {e}")
+            return []
+
+    async def get_database(self, slug: str) -> Optional[Dict]:
+        """Get a specific game database by slug"""
+        return await self.db.game_databases.find_one({'slug': slug})
+
+    async def add_database(self, name: str, slug: str) -> bool:
+        """Add a new game database"""
+        try:
+            await self.db.game_databases.insert_one({
+                'name': name,
+                'slug': slug,
+                'created_at': datetime.utcnow(),
+                'last_updated': None,
+                'profile_count': 0,
+                'active_profiles': 0,
+                'record_count': 0
+            })
+            self._invalidate()
+            return True
+        except Exception as e:
+            print(f"Failed to add database: {e}")
+            return False
+
+    async def delete_database(self, slug: str) -> bool:
+        """Delete a game database and all its data"""
+        try:
+            db = await self.db.game_databases.find_one({'slug': slug})
+            if db:
+                # Delete all profiles and scraped data for this database
+                await self.db.profiles.delete_many({'database_id': db['_id']})
+                await self.db.scraped_data.delete_many({'database_id': db['_id']})
+                await self.db.game_databases.delete_one({'_id': db['_id']})
+                self._invalidate()
+            return True
+        except Exception as e:
+            print(f"Failed to delete database: {e}")
+            return False
+
+    # Profile Management
+    async def get_profile(self, database_id: ObjectId, profile_id: ObjectId) -> Optional[Dict]:
+        """Get a profile of a specific database"""
+        return await self.db.profiles.find_one({'_id': profile_id, 'database_id': database_id})
+
+    async def get_profiles(self, database_id: ObjectId) -> List[Dict]:
+        """Get all profiles for a specific database"""
+        try:
+            profiles = await self.db.profiles.find({'database_id': database_id}).to_list(None)
+            for profile in profiles:
+                profile.setdefault('record_count', 0)
+            return profiles
+        except Exception as e:
+            print(f"Failed to get profiles: {e}")
+            return []
+
+    async def get_active_profiles(self, database_id: Optional[ObjectId] = None) -> List[Dict]:
+        """Get active profiles for a specific database, or across all databases"""
+        try:
+            query = {'active': True}
+            if database_id is not None:
+                query['database_id'] = database_id
+            return await self.db.profiles.find(query).to_list(None)
+        except Exception as e:
+            print(f"Failed to get active profiles: {e}")
+            return []
+
+    async def add_profile(self, database_id: ObjectId, url: str, description: str = None) -> bool:
+        """Add a new profile to a database"""
+        try:
+            await self.db.profiles.insert_one({
+                'database_id': database_id,
+                'url': url,
+                'description': description,
+                'active': True,
+                'added_at': datetime.utcnow(),
+                'last_scraped': None,
+                'record_count': 0
+            })
+            await self.db.game_databases.update_one(
+                {'_id': database_id},
+                {'$inc': {'profile_count': 1, 'active_profiles': 1}}
+            )
+            self._invalidate()
+            return True
+        except Exception as e:
+            print(f"Failed to add profile: {e}")
+            return False
+
+    async def toggle_profile(self, profile_id: ObjectId) -> Optional[bool]:
+        """Toggle profile active status, returns the new status or None if not found"""
+        try:
+            profile = await self.db.profiles.find_one_and_update(
+                {'_id': profile_id},
+                TOGGLE_ACTIVE_UPDATE,
+                return_document=ReturnDocument.AFTER
+            )
+            if not profile:
+                return None
+            await self.db.game_databases.update_one(
+                {'_id': profile['database_id']},
+                {'$inc': {'active_profiles': 1 if profile['active'] else -1}}
+            )
+            self._invalidate()
+            return profile['active']
+        except Exception as e:
+            print(f"Failed to toggle profile: {e}")
+            return None
+
+    async def delete_profile(self, profile_id: ObjectId) -> bool:
+        """Delete a profile and its scraped data"""
+        try:
+            profile = await self.db.profiles.find_one_and_delete({'_id': profile_id})
+            if not profile:
+                return True
+            result = await self.db.scraped_data.delete_many(
+                {'database_id': profile['database_id'], 'profile_id': profile_id}
+            )
+            await self.db.game_databases.update_one(
+                {'_id': profile['database_id']},
+                {'$inc': {
+                    'profile_count': -1,
+                    'active_profiles': -1 if profile.get('active', True) else 0,
+                    'record_count': -result.deleted_count
+                }}
+            )
+            self._invalidate()
+            return True
+        except Exception as e:
+            print(f"Failed to delete profile: {e}")
+            return False
+
+    # Data Management
+    async def get_latest_tweet_id(self, database_id: ObjectId, profile_id: ObjectId) -> Optional[str]:
+        """Get the newest tweet ID stored for a profile (high-water mark)"""
+        try:
+            latest = await self.db.scraped_data.find_one(
+                {'database_id': database_id, 'profile_id': profile_id},
+                {'id': 1},
+                sort=[('id', DESCENDING)],
+                collation=NUMERIC_COLLATION
+            )
+            return latest['id'] if latest else None
+        except Exception as e:
+            print(f"Failed to get latest tweet for profile {profile_id}: {e}")
+            return None
+
+    async def bulk_upsert_posts(self, database_id: ObjectId, profile_id: ObjectId, posts: List[Dict],
+                                profile_url: str = None, overwrite: bool = True) -> Tuple[int, int]:
+        """Upsert scraped posts in one unordered bulk write, returns (inserted_count, matched_count)"""
+        operations = build_post_upserts(database_id, profile_id, posts, profile_url, overwrite)
+        if not operations:
+            return 0, 0
+
+        try:
+            result = await self.db.scraped_data.bulk_write(operations, ordered=False)
+            inserted, matched = result.upserted_count, result.matched_count
+        except BulkWriteError as e:
+            inserted, matched = bulk_write_error_counts(e, len(operations))
+
+        if inserted:
+            for collection, query, update in record_counter_updates(database_id, profile_id, inserted):
+                try:
+                    await self.db[collection].update_one(query, update)
+                except Exception as e:
+                    print(f"Failed to update {collection} counters: {e}")
+        self._invalidate()
+        return inserted, matched
+
+    async def save_tweets(self, database_id: ObjectId, profile_id: ObjectId, tweets: List[Tweet]) -> Tuple[int, int]:
+        """Save tweets to database, returns (saved_count, duplicate_count)"""
+        saved, duplicates = await self.bulk_upsert_posts(database_id, profile_id, tweet_documents(tweets), overwrite=False)
+
+        if saved > 0:
+            await self.update_database_last_updated(database_id)
+
+        return saved, duplicates
+
+    async def count_recent_posts(self, database_id: ObjectId, profile_id: ObjectId, since: datetime) -> int:
+        """Count a profile's stored posts published since a date"""
+        try:
+            return await self.db.scraped_data.count_documents(
+                {'database_id': database_id, 'profile_id': profile_id, 'timestamp': {'$gte': since}}
+            )
+        except Exception as e:
+            print(f"Failed to count recent posts for profile {profile_id}: {e}")
+            return 0
+
+    async def update_profile_schedule(self, profile_id: ObjectId, schedule: Dict):
+        """Persist a profile's next_scrape_at and post_rate"""
+        try:
+            await self.db.profiles.update_one({'_id': profile_id}, {'$set': schedule})
+        except Exception as e:
+            print(f"Failed to update schedule for profile {profile_id}: {e}")
+
+    async def set_pending_since_id(self, profile_id: ObjectId, since_id: Optional[str]):
+        """Keep the high-water mark a scrape cut short by its deadline started from, unless one is kept already"""
+        try:
+            await self.db.profiles.update_one(
+                {'_id': profile_id, 'pending_since_id': {'$exists': False}},
+                {'$set': {'pending_since_id': since_id}}
+            )
+        except Exception as e:
+            print(f"Failed to set pending since_id for profile {profile_id}: {e}")
+
+    async def clear_pending_since_id(self, profile_id: ObjectId):
+        """Drop the kept high-water mark once a scrape reached it"""
+        try:
+            await self.db.profiles.update_one({'_id': profile_id}, {'$unset': {'pending_since_id': ''}})
+        except Exception as e:
+            print(f"Failed to clear pending since_id for profile {profile_id}: {e}")
+
+    async def update_profile_last_scraped(self, profile_id: ObjectId, scrape_count: Optional[int] = None):
+        """Update the last_scraped timestamp (and optionally last_scrape_count) for a profile"""
+        try:
+            update = {'last_scraped': datetime.utcnow()}
+            if scrape_count is not None:
+                update['last_scrape_count'] = scrape_count
+            await self.db.profiles.update_one(
+                {'_id': profile_id},
+                {'$set': update}
+            )
+            self._invalidate()
+        except Exception as e:
+            print(f"Failed to update last_scraped for profile {profile_id}: {e}")
+
+    async def update_database_last_updated(self, database_id: ObjectId):
+        """Update the last_updated timestamp for a database"""
+        try:
+            await self.db.game_databases.update_one(
+                {'_id': database_id},
+                {'$set': {'last_updated': datetime.utcnow()}}
+            )
+            self._invalidate()
+        except Exception as e:
+            print(f"Failed to update last_updated for database {database_id}: {e}")
@@ -1,13 +1,25 @@
 import os
 import asyncio
+from fnmatch import fnmatch
+from typing import Tuple
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 import json
 import logging
 from .config import Config
+from .page_scripts import TWEET_OBSERVER_INIT_JS
 
 class BrowserAuth:
     MAX_RETRIES = 3
     RETRY_DELAY = 5
+    
+    # Typical transfer sizes, used to estimate bytes saved by blocked requests
+    ESTIMATED_RESOURCE_BYTES = {
+        'image': 30000,
+        'media': 250000,
+        'font': 40000,
+        'stylesheet': 20000,
+    }
+    DEFAULT_ESTIMATED_BYTES = 10000
 
     def __init__(self, config: Config, headless=False):
         self.config = config
@@ -17,6 +29,7 @@ class BrowserAuth:
         self.page: Page = None
         self.cookie_path = 'auth.json'
         self.logger = logging.getLogger(__name__)
+        self.blocked = {}  # page -> [blocked requests, estimated bytes saved]
 
     async def __aenter__(self):
         await self.launch_browser()
@@ -40,6 +53,7 @@ class BrowserAuth:
                     'height': self.config.viewport_height
                 }
             )
+            await self._prepare_context(self.context)
             
             self.page = await self.context.new_page()
             self.logger.info("Browser launched successfully")
@@ -115,6 +129,39 @@ class BrowserAuth:
         if hasattr(self, 'playwright'):
             await self.playwright.stop()
 
+    async def _prepare_context(self, context: BrowserContext):
+        """Install the tweet observer and the resource block policy on a context"""
+        if self.config.tweet_observer:
+            await context.add_init_script(TWEET_OBSERVER_INIT_JS)
+        if self.config.block_resource_types or self.config.block_url_patterns:
+            await context.route('**/*', self._route_request)
+            
+    def _should_block(self, request) -> bool:
+        if request.resource_type in self.config.block_resource_types:
+            return True
+        return any(fnmatch(request.url, pattern) for pattern in self.config.block_url_patterns)
+        
+    async def _route_request(self, route):
+        """Abort blocked requests and count them against their page"""
+        request = route.request
+        if not self._should_block(request):
+            await route.continue_()
+            return
+            
+        try:
+            counters = self.blocked.setdefault(request.frame.page, [0, 0])
+            counters[0] += 1
+            counters[1] += self.ESTIMATED_RESOURCE_BYTES.get(request.resource_type, self.DEFAULT_ESTIMATED_BYTES)
+        except Exception:
+            # Service worker requests have no frame to attribute them to
+            pass
+        await route.abort('blockedbyclient')
+        
+    def take_blocked_counters(self, page: Page) -> Tuple[int, int]:
+        """Return and reset (blocked requests, estimated bytes saved) for a page"""
+        requests, saved_bytes = self.blocked.pop(page, (0, 0))
+        return requests, saved_bytes
+        
     async def _has_valid_cookies(self):
         """Check cookies using the main browser context"""
         try:
@@ -127,6 +174,7 @@ class BrowserAuth:
                 storage_state=self.cookie_path,
                 viewport={'width': 1280, 'height': 720}
             )
+            await self._prepare_context(self.context)
             
             # Check login state
             if not self.page:
@@ -1,9 +1,13 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List
 from dotenv import load_dotenv
 import os
 import logging
 
+def _split_list(value: str) -> List[str]:
+    """Split a comma separated environment value"""
+    return [item.strip() for item in value.split(',') if item.strip()]
+
 @dataclass
 class Config:
     """Configuration for X scraper"""
@@ -14,6 +18,28 @@ class Config:
     # Scraping settings
     posts_limit: int = 30
     headless: bool = True
+    max_concurrency: int = 4  # pages scraped in parallel per browser
+    max_stale_scrolls: int = 3  # scrolls without new tweets before giving up
+    scroll_viewports: float = 1.5  # scroll distance in viewport heights
+    scroll_wait_timeout: int = 3000  # max milliseconds to wait for new tweets after a scroll
+    tweet_observer: bool = True  # record tweets in-page as they render
+    extraction_mode: str = 'network'  # 'network' (timeline JSON, DOM fallback) or 'dom'
+    high_water_overlap: int = 2  # already-stored tweets to see before stopping (covers pinned tweets)
+    profile_budget: int = 120  # seconds one profile may take before its scrape is cut short
+    navigation_timeout: int = 20000  # milliseconds for a profile page to load
+    timeline_timeout: int = 15000  # milliseconds for the timeline column to render
+    
+    # Adaptive scheduling (scraper_job.py --adaptive)
+    schedule_target_posts: float = 5.0  # new posts a visit should find on average
+    schedule_min_interval: int = 30  # minutes between visits of the busiest profiles
+    schedule_max_interval: int = 2880  # minutes between visits of dormant profiles
+    scrape_budget_per_hour: int = 60  # profile visits per hour across all profiles
+    lease_ttl: int = 300  # seconds a worker's claim on a profile lasts without heartbeat
+    
+    # Resident daemon (scraper_daemon.py)
+    daemon_interval: int = 360  # minutes between scheduled runs
+    daemon_control_host: str = '127.0.0.1'  # address of the command socket
+    daemon_control_port: int = 8765
     
     # Browser settings
     timeout: int = 45000  # milliseconds
@@ -23,6 +49,10 @@ class Config:
     viewport_width: int = 1280
     viewport_height: int = 720
     
+    # Resource policy: requests that are aborted instead of downloaded
+    block_resource_types: List[str] = field(default_factory=lambda: ['image', 'media', 'font'])
+    block_url_patterns: List[str] = field(default_factory=list)  # fnmatch-style, e.g. '*video.twimg.com*'
+    
     # Logging
     log_level: str = 'INFO'
     
@@ -40,9 +70,29 @@ class Config:
             mongodb_uri=mongodb_uri,
             posts_limit=int(os.getenv('POSTS_LIMIT', '30')),
             headless=os.getenv('HEADLESS', 'true').lower() == 'true',
+            max_concurrency=int(os.getenv('SCRAPE_CONCURRENCY', '4')),
+            max_stale_scrolls=int(os.getenv('MAX_STALE_SCROLLS', '3')),
+            scroll_viewports=float(os.getenv('SCROLL_VIEWPORTS', '1.5')),
+            scroll_wait_timeout=int(os.getenv('SCROLL_WAIT_TIMEOUT', '3000')),
+            tweet_observer=os.getenv('TWEET_OBSERVER', 'true').lower() == 'true',
+            extraction_mode=os.getenv('EXTRACTION_MODE', 'network').lower(),
+            high_water_overlap=int(os.getenv('HIGH_WATER_OVERLAP', '2')),
+            profile_budget=int(os.getenv('PROFILE_BUDGET', '120')),
+            navigation_timeout=int(os.getenv('NAVIGATION_TIMEOUT', '20000')),
+            timeline_timeout=int(os.getenv('TIMELINE_TIMEOUT', '15000')),
+            schedule_target_posts=float(os.getenv('SCHEDULE_TARGET_POSTS', '5')),
+            schedule_min_interval=int(os.getenv('SCHEDULE_MIN_INTERVAL', '30')),
+            schedule_max_interval=int(os.getenv('SCHEDULE_MAX_INTERVAL', '2880')),
+            scrape_budget_per_hour=int(os.getenv('SCRAPE_BUDGET_PER_HOUR', '60')),
+            lease_ttl=int(os.getenv('LEASE_TTL', '300')),
+            daemon_interval=int(os.getenv('DAEMON_INTERVAL', '360')),
+            daemon_control_host=os.getenv('DAEMON_CONTROL_HOST', '127.0.0.1'),
+            daemon_control_port=int(os.getenv('DAEMON_CONTROL_PORT', '8765')),
             timeout=int(os.getenv('TIMEOUT', '45000')),
             viewport_width=int(os.getenv('VIEWPORT_WIDTH', '1280')),
             viewport_height=int(os.getenv('VIEWPORT_HEIGHT', '720')),
+            block_resource_types=_split_list(os.getenv('BLOCK_RESOURCE_TYPES', 'image,media,font')),
+            block_url_patterns=_split_list(os.getenv('BLOCK_URL_PATTERNS', '')),
             log_level=os.getenv('LOG_LEVEL', 'INFO')
         )
         
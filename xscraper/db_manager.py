@@ -1,16 +1,108 @@
 from datetime import datetime
 from typing import List, Tuple, Dict, Optional
-from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo import MongoClient, ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.collation import Collation
+from pymongo.errors import BulkWriteError
 from bson import ObjectId
 from .models import Tweet
+from .utils import parse_timestamp
+from .stats import database_overview
+from .cache import TTLCache
+
+# Tweet IDs are stored as strings, this collation compares them numerically
+NUMERIC_COLLATION = Collation('en', numericOrdering=True)
+
+def build_post_upserts(database_id: ObjectId, profile_id: ObjectId, posts: List[Dict],
+                       profile_url: str = None, overwrite: bool = True) -> List[UpdateOne]:
+    """Build the upsert operations for a profile's scraped posts"""
+    now = datetime.utcnow()
+    documents = {}
+    for post in posts:
+        document = dict(post)
+        document['database_id'] = database_id
+        document['profile_id'] = profile_id
+        if profile_url:
+            document['profile_url'] = profile_url
+        if isinstance(document.get('timestamp'), str):
+            document['timestamp'] = parse_timestamp(document['timestamp'])
+        # Duplicate IDs within one batch would race on the unique index
+        documents[document['id']] = document
+        
+    operations = []
+    for document in documents.values():
+        key = {'database_id': database_id, 'profile_id': profile_id, 'id': document['id']}
+        if overwrite:
+            document['last_updated'] = now
+            update = {'$set': document, '$setOnInsert': {'scraped_at': now}}
+        else:
+            update = {'$setOnInsert': {**document, 'scraped_at': now}}
+        operations.append(UpdateOne(key, update, upsert=True))
+    return operations
+
+def bulk_write_error_counts(error: BulkWriteError, total: int) -> Tuple[int, int]:
+    """Report a partially failed bulk upsert, returns (inserted_count, matched_count)"""
+    write_errors = error.details['writeErrors']
+    print(f"Failed to save {len(write_errors)} of {total} posts: {write_errors[0]['errmsg']}")
+    return error.details['nUpserted'], error.details['nMatched']
+
+# migrations document recording that string timestamps were converted
+STRING_TIMESTAMPS_MIGRATION = 'string_timestamps'
+
+def migrate_string_timestamps(db, batch_size: int = 1000) -> int:
+    """Convert record timestamps stored as strings by older runs to dates, returns how many were converted
+
+    Keyset pagination compares timestamps with $lt/$gt, which only match
+    values of the same BSON type, so string timestamps drop out of it.
+    """
+    converted = 0
+    operations = []
+    for record in db.scraped_data.find({'timestamp': {'$type': 'string'}}, {'timestamp': 1}):
+        timestamp = parse_timestamp(record['timestamp'])
+        operations.append(UpdateOne({'_id': record['_id']}, {'$set': {'timestamp': timestamp}}))
+        if len(operations) >= batch_size:
+            converted += db.scraped_data.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        converted += db.scraped_data.bulk_write(operations, ordered=False).modified_count
+    # New records are written with dates, so the scan never has to run again
+    db.migrations.update_one(
+        {'_id': STRING_TIMESTAMPS_MIGRATION},
+        {'$set': {'finished_at': datetime.utcnow(), 'converted': converted}},
+        upsert=True
+    )
+    return converted
+
+def string_timestamps_migrated(db) -> bool:
+    """True once migrate_string_timestamps completed on this database"""
+    return db.migrations.find_one({'_id': STRING_TIMESTAMPS_MIGRATION}) is not None
+
+# Flips profiles.active atomically, treating a missing field as active
+TOGGLE_ACTIVE_UPDATE = [{'$set': {'active': {'$not': [{'$ifNull': ['$active', True]}]}}}]
+
+def record_counter_updates(database_id: ObjectId, profile_id: ObjectId, count: int) -> List[Tuple[str, Dict, Dict]]:
+    """(collection, filter, update) triples that move record counters by `count`"""
+    return [
+        ('profiles', {'_id': profile_id}, {'$inc': {'record_count': count}}),
+        ('game_databases', {'_id': database_id}, {'$inc': {'record_count': count}}),
+    ]
+
+def tweet_documents(tweets: List[Tweet]) -> List[Dict]:
+    """Convert Tweet models to scraped_data documents"""
+    return [{
+        'id': tweet.id,
+        'text': tweet.text,
+        'created_at': tweet.created_at,
+        'author_username': tweet.author_username
+    } for tweet in tweets]
 
 class DBManager:
     """Manages database operations"""
     
-    def __init__(self, uri: str):
+    def __init__(self, uri: str, cache: Optional[TTLCache] = None):
         self.uri = uri
         self.client = None
         self.db = None
+        self.cache = cache  # invalidated after every write
         
     def connect(self) -> bool:
         """Connect to MongoDB"""
@@ -27,30 +119,15 @@ class DBManager:
         if self.client:
             self.client.close()
 
+    def _invalidate(self):
+        if self.cache:
+            self.cache.invalidate()
+
     # Database Management
     def get_all_databases(self) -> List[Dict]:
         """Get all game databases with their stats"""
         try:
-            databases = self.db.game_databases.find()
-            result = []
-            for db in databases:
-                profile_count = self.db.profiles.count_documents({'database_id': db['_id']})
-                active_profiles = self.db.profiles.count_documents({
-                    'database_id': db['_id'],
-                    'active': True
-                })
-                record_count = self.db.scraped_data.count_documents({'database_id': db['_id']})
-                
-                result.append({
-                    '_id': db['_id'],
-                    'name': db['name'],
-                    'slug': db['slug'],
-                    'profile_count': profile_count,
-                    'active_profiles': active_profiles,
-                    'record_count': record_count,
-                    'last_updated': db.get('last_updated')
-                })
-            return result
+            return database_overview(self.db)
         except Exception as e:
             print(f"Failed to get databases: {e}")
             return []
@@ -66,8 +143,12 @@ class DBManager:
                 'name': name,
                 'slug': slug,
                 'created_at': datetime.utcnow(),
-                'last_updated': None
+                'last_updated': None,
+                'profile_count': 0,
+                'active_profiles': 0,
+                'record_count': 0
             })
+            self._invalidate()
             return True
         except Exception as e:
             print(f"Failed to add database: {e}")
@@ -82,6 +163,7 @@ class DBManager:
                 self.db.profiles.delete_many({'database_id': db['_id']})
                 self.db.scraped_data.delete_many({'database_id': db['_id']})
                 self.db.game_databases.delete_one({'_id': db['_id']})
+                self._invalidate()
             return True
         except Exception as e:
             print(f"Failed to delete database: {e}")
@@ -93,22 +175,19 @@ class DBManager:
         try:
             profiles = list(self.db.profiles.find({'database_id': database_id}))
             for profile in profiles:
-                profile['record_count'] = self.db.scraped_data.count_documents({
-                    'database_id': database_id,
-                    'profile_id': profile['_id']
-                })
+                profile.setdefault('record_count', 0)
             return profiles
         except Exception as e:
             print(f"Failed to get profiles: {e}")
             return []
 
-    def get_active_profiles(self, database_id: ObjectId) -> List[Dict]:
-        """Get active profiles for a specific database"""
+    def get_active_profiles(self, database_id: Optional[ObjectId] = None) -> List[Dict]:
+        """Get active profiles for a specific database, or across all databases"""
         try:
-            return list(self.db.profiles.find({
-                'database_id': database_id,
-                'active': True
-            }))
+            query = {'active': True}
+            if database_id is not None:
+                query['database_id'] = database_id
+            return list(self.db.profiles.find(query))
         except Exception as e:
             print(f"Failed to get active profiles: {e}")
             return []
@@ -122,85 +201,127 @@ class DBManager:
                 'description': description,
                 'active': True,
                 'added_at': datetime.utcnow(),
-                'last_scraped': None
+                'last_scraped': None,
+                'record_count': 0
             })
+            self.db.game_databases.update_one(
+                {'_id': database_id},
+                {'$inc': {'profile_count': 1, 'active_profiles': 1}}
+            )
+            self._invalidate()
             return True
         except Exception as e:
             print(f"Failed to add profile: {e}")
             return False
 
-    def toggle_profile(self, profile_id: ObjectId) -> bool:
-        """Toggle profile active status"""
+    def toggle_profile(self, profile_id: ObjectId) -> Optional[bool]:
+        """Toggle profile active status, returns the new status or None if not found"""
         try:
-            profile = self.db.profiles.find_one({'_id': profile_id})
-            if profile:
-                self.db.profiles.update_one(
-                    {'_id': profile_id},
-                    {'$set': {'active': not profile.get('active', True)}}
-                )
-            return True
+            profile = self.db.profiles.find_one_and_update(
+                {'_id': profile_id},
+                TOGGLE_ACTIVE_UPDATE,
+                return_document=ReturnDocument.AFTER
+            )
+            if not profile:
+                return None
+            self.db.game_databases.update_one(
+                {'_id': profile['database_id']},
+                {'$inc': {'active_profiles': 1 if profile['active'] else -1}}
+            )
+            self._invalidate()
+            return profile['active']
         except Exception as e:
             print(f"Failed to toggle profile: {e}")
-            return False
+            return None
 
     def delete_profile(self, profile_id: ObjectId) -> bool:
         """Delete a profile and its scraped data"""
         try:
-            self.db.scraped_data.delete_many({'profile_id': profile_id})
-            self.db.profiles.delete_one({'_id': profile_id})
+            profile = self.db.profiles.find_one_and_delete({'_id': profile_id})
+            if not profile:
+                return True
+            deleted = self.db.scraped_data.delete_many(
+                {'database_id': profile['database_id'], 'profile_id': profile_id}
+            ).deleted_count
+            self.db.game_databases.update_one(
+                {'_id': profile['database_id']},
+                {'$inc': {
+                    'profile_count': -1,
+                    'active_profiles': -1 if profile.get('active', True) else 0,
+                    'record_count': -deleted
+                }}
+            )
+            self._invalidate()
             return True
         except Exception as e:
             print(f"Failed to delete profile: {e}")
             return False
 
     # Data Management
-    async def save_tweets(self, database_id: ObjectId, profile_id: ObjectId, tweets: List[Tweet]) -> Tuple[int, int]:
-        """Save tweets to database, returns (saved_count, duplicate_count)"""
-        saved = 0
-        duplicates = 0
+    def get_latest_tweet_id(self, database_id: ObjectId, profile_id: ObjectId) -> Optional[str]:
+        """Get the newest tweet ID stored for a profile (high-water mark)"""
+        try:
+            latest = self.db.scraped_data.find_one(
+                {'database_id': database_id, 'profile_id': profile_id},
+                {'id': 1},
+                sort=[('id', DESCENDING)],
+                collation=NUMERIC_COLLATION
+            )
+            return latest['id'] if latest else None
+        except Exception as e:
+            print(f"Failed to get latest tweet for profile {profile_id}: {e}")
+            return None
+
+    def bulk_upsert_posts(self, database_id: ObjectId, profile_id: ObjectId, posts: List[Dict],
+                          profile_url: str = None, overwrite: bool = True) -> Tuple[int, int]:
+        """Upsert scraped posts in one unordered bulk write, returns (inserted_count, matched_count)
+        
+        With overwrite the stored fields are refreshed from the new scrape,
+        otherwise existing records are left untouched.
+        """
+        operations = build_post_upserts(database_id, profile_id, posts, profile_url, overwrite)
+        if not operations:
+            return 0, 0
+            
+        try:
+            result = self.db.scraped_data.bulk_write(operations, ordered=False)
+            inserted, matched = result.upserted_count, result.matched_count
+        except BulkWriteError as e:
+            inserted, matched = bulk_write_error_counts(e, len(operations))
+            
+        if inserted:
+            self._update_counters(record_counter_updates(database_id, profile_id, inserted))
+        self._invalidate()
+        return inserted, matched
         
-        for tweet in tweets:
+    def _update_counters(self, updates: List[Tuple[str, Dict, Dict]]):
+        """Apply counter $inc updates, drift is repaired by reconcile_counters"""
+        for collection, query, update in updates:
             try:
-                result = self.db.scraped_data.update_one(
-                    {
-                        'database_id': database_id,
-                        'profile_id': profile_id,
-                        'id': tweet.id
-                    },
-                    {
-                        '$setOnInsert': {
-                            'database_id': database_id,
-                            'profile_id': profile_id,
-                            'id': tweet.id,
-                            'text': tweet.text,
-                            'created_at': tweet.created_at,
-                            'author_username': tweet.author_username,
-                            'scraped_at': datetime.utcnow()
-                        }
-                    },
-                    upsert=True
-                )
-                
-                if result.upserted_id:
-                    saved += 1
-                else:
-                    duplicates += 1
-                    
+                self.db[collection].update_one(query, update)
             except Exception as e:
-                print(f"Failed to save tweet {tweet.id}: {e}")
+                print(f"Failed to update {collection} counters: {e}")
+            
+    async def save_tweets(self, database_id: ObjectId, profile_id: ObjectId, tweets: List[Tweet]) -> Tuple[int, int]:
+        """Save tweets to database, returns (saved_count, duplicate_count)"""
+        saved, duplicates = self.bulk_upsert_posts(database_id, profile_id, tweet_documents(tweets), overwrite=False)
                 
         if saved > 0:
             self.update_database_last_updated(database_id)
                 
         return saved, duplicates
 
-    def update_profile_last_scraped(self, profile_id: ObjectId):
-        """Update the last_scraped timestamp for a profile"""
+    def update_profile_last_scraped(self, profile_id: ObjectId, scrape_count: Optional[int] = None):
+        """Update the last_scraped timestamp (and optionally last_scrape_count) for a profile"""
         try:
+            update = {'last_scraped': datetime.utcnow()}
+            if scrape_count is not None:
+                update['last_scrape_count'] = scrape_count
             self.db.profiles.update_one(
                 {'_id': profile_id},
-                {'$set': {'last_scraped': datetime.utcnow()}}
+                {'$set': update}
             )
+            self._invalidate()
         except Exception as e:
             print(f"Failed to update last_scraped for profile {profile_id}: {e}")
 
@@ -211,5 +332,6 @@ class DBManager:
                 {'_id': database_id},
                 {'$set': {'last_updated': datetime.utcnow()}}
             )
+            self._invalidate()
         except Exception as e:
             print(f"Failed to update last_updated for database {database_id}: {e}")
\ No newline at end of file
@@ -0,0 +1,119 @@
+import json
+import asyncio
+import threading
+import itertools
+import contextvars
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional
+
+# Scrape job the running task works for; run_scrape_job sets it, so the
+# events of the scraper tasks it starts carry the job_id
+current_job = contextvars.ContextVar('current_job', default=None)
+
+class Subscription:
+    """A subscriber's bounded event buffer, oldest events are dropped when full
+
+    Threads wait for events with get(), coroutines with aget().
+    """
+
+    def __init__(self, max_queued: int, job_id: str = None):
+        self._events = deque(maxlen=max_queued)
+        self._ready = threading.Condition()
+        self._loop = None  # loop of the aget() waiter, woken through _wakeup
+        self._wakeup = None
+        self.job_id = job_id  # only receive this job's events if set
+        self.dropped = 0  # events lost since the last get()
+
+    def put(self, event: Dict):
+        if self.job_id is not None and event.get('job_id') != self.job_id:
+            return
+        with self._ready:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            self._ready.notify()
+            loop = self._loop
+        if loop is not None:
+            try:
+                # Publishers may run on another thread than the waiting coroutine
+                loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass  # the waiter's loop is closed
+
+    def get(self, timeout: float = None) -> Optional[Dict]:
+        """Wait for the next event, returns None on timeout
+
+        If events were dropped since the last call a 'dropped' event
+        carrying their count is returned first.
+        """
+        with self._ready:
+            if not self._events:
+                self._ready.wait(timeout)
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                return {'type': 'dropped', 'count': dropped}
+            return self._events.popleft() if self._events else None
+
+    async def aget(self, timeout: float = None) -> Optional[Dict]:
+        """Await the next event without blocking the loop, returns None on timeout"""
+        with self._ready:
+            if self._loop is None:
+                self._loop = asyncio.get_running_loop()
+                self._wakeup = asyncio.Event()
+        self._wakeup.clear()
+        event = self.get(timeout=0)
+        if event is not None:
+            return event
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return self.get(timeout=0)
+
+class EventBus:
+    """Fans scrape events out to subscribers
+
+    publish() never blocks: each subscriber has its own bounded buffer,
+    so a slow client loses old events instead of holding up the scraper.
+    Safe to use across threads (job worker publishing, request threads
+    subscribed).
+    """
+
+    def __init__(self, max_queued: int = 200):
+        self.max_queued = max_queued
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def publish(self, event_type: str, **data) -> Dict:
+        """Send an event to all current subscribers"""
+        event = {'id': next(self._ids), 'type': event_type, 'time': datetime.utcnow().isoformat() + 'Z', **data}
+        if 'job_id' not in event and current_job.get() is not None:
+            event['job_id'] = current_job.get()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(event)
+        return event
+
+    def subscribe(self, job_id: str = None) -> Subscription:
+        """Start buffering events, only those of job_id if given"""
+        subscription = Subscription(self.max_queued, job_id)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+def format_sse(event: Dict) -> str:
+    """Encode an event in text/event-stream format"""
+    lines = [f"event: {event['type']}", f"data: {json.dumps(event, default=str)}"]
+    if 'id' in event:
+        lines.insert(0, f"id: {event['id']}")
+    return '\n'.join(lines) + '\n\n'
+
+# Process wide bus the scraper and web app share by default
+scrape_events = EventBus()
@@ -0,0 +1,163 @@
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo.collation import Collation
+from .db_manager import NUMERIC_COLLATION
+from .leases import claimable_query
+from .pagination import encode_cursor, page_query
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class IndexSpec:
+    """An index the application relies on"""
+    collection: str
+    keys: List[Tuple[str, int]]
+    unique: bool = False
+    name: Optional[str] = None  # only needed when the default name would clash
+    collation: Optional[Collation] = None
+
+    def options(self) -> Dict:
+        options = {}
+        if self.unique:
+            options['unique'] = True
+        if self.name:
+            options['name'] = self.name
+        if self.collation:
+            options['collation'] = self.collation
+        return options
+
+@dataclass
+class QueryShape:
+    """A query the application runs, with sample values for explain"""
+    name: str
+    collection: str
+    filter: Dict
+    sort: Optional[Dict] = None
+    collation: Optional[Collation] = None
+    used_by: List[str] = field(default_factory=list)
+
+# Placeholder values, explain only looks at the shape of the query
+_ID = ObjectId()
+_DATE = datetime(2024, 1, 1)
+
+def _records_page_shape(name: str, after: str = None, before: str = None) -> QueryShape:
+    """The query paginate_records sends for a profile's records"""
+    query, sort = page_query({'database_id': _ID, 'profile_id': _ID}, after, before)
+    return QueryShape(name, 'scraped_data', query, sort=dict(sort),
+                      used_by=['view_profile_records', 'api_profile_records'])
+
+_CURSOR = encode_cursor({'_id': _ID, 'timestamp': _DATE})
+_UNTIMED_CURSOR = encode_cursor({'_id': _ID})
+
+INDEXES = [
+    IndexSpec('game_databases', [('slug', 1)], unique=True),
+    IndexSpec('profiles', [('database_id', 1), ('url', 1)], unique=True),
+    IndexSpec('profiles', [('active', 1), ('database_id', 1)]),
+    IndexSpec('profiles', [('active', 1), ('next_scrape_at', 1)]),
+    IndexSpec('scraped_data', [('database_id', 1), ('profile_id', 1), ('id', 1)], unique=True),
+    IndexSpec('scraped_data', [('database_id', 1), ('profile_id', 1), ('id', -1)],
+              name='database_id_1_profile_id_1_id_-1_numeric', collation=NUMERIC_COLLATION),
+    IndexSpec('scraped_data', [('database_id', 1), ('profile_id', 1), ('timestamp', -1), ('_id', -1)]),
+    IndexSpec('scrape_jobs', [('status', 1), ('created_at', 1)]),
+    IndexSpec('scrape_runs', [('status', 1), ('started_at', -1)]),
+    IndexSpec('tweets', [('created_at', -1)]),
+    IndexSpec('tweets', [('scraped_at', -1)]),
+]
+
+QUERY_SHAPES = [
+    QueryShape('database_by_slug', 'game_databases', {'slug': 'cs2'},
+               used_by=['web_app routes']),
+    QueryShape('profiles_by_database', 'profiles', {'database_id': _ID},
+               used_by=['view_database', 'DBManager.get_profiles']),
+    QueryShape('profile_by_url', 'profiles', {'database_id': _ID, 'url': 'https://x.com/CounterStrike'},
+               used_by=['add_profile']),
+    QueryShape('active_profiles', 'profiles', {'active': True},
+               used_by=['scraper_job', 'scrape_all']),
+    QueryShape('active_profiles_by_database', 'profiles', {'database_id': _ID, 'active': True},
+               used_by=['scrape_profiles', 'DBManager.get_active_profiles']),
+    QueryShape('claimable_profiles', 'profiles', claimable_query(_DATE), sort={'next_scrape_at': 1},
+               used_by=['LeaseQueue.claim']),
+    QueryShape('recent_posts', 'scraped_data',
+               {'database_id': _ID, 'profile_id': _ID, 'timestamp': {'$gte': _DATE}},
+               used_by=['AsyncDBManager.count_recent_posts']),
+    QueryShape('tweet_upsert', 'scraped_data', {'database_id': _ID, 'profile_id': _ID, 'id': '1'},
+               used_by=['DBManager.bulk_upsert_posts']),
+    QueryShape('latest_tweet_id', 'scraped_data', {'database_id': _ID, 'profile_id': _ID},
+               sort={'id': -1}, collation=NUMERIC_COLLATION,
+               used_by=['DBManager.get_latest_tweet_id']),
+    _records_page_shape('records_page'),
+    _records_page_shape('records_page_after', after=_CURSOR),
+    _records_page_shape('records_page_after_untimed', after=_UNTIMED_CURSOR),
+    _records_page_shape('records_page_before', before=_CURSOR),
+    QueryShape('records_by_database', 'scraped_data', {'database_id': _ID},
+               used_by=['delete_database', 'reconcile_counters']),
+    QueryShape('records_by_profile', 'scraped_data', {'database_id': _ID, 'profile_id': _ID},
+               used_by=['delete_profile', 'export_data']),
+    QueryShape('next_queued_job', 'scrape_jobs', {'status': 'queued'}, sort={'created_at': 1},
+               used_by=['claim_job']),
+    QueryShape('stale_jobs', 'scrape_jobs',
+               {'status': 'running', '$or': [{'lease_expires': None}, {'lease_expires': {'$lt': _DATE}}]},
+               used_by=['fail_stale_jobs']),
+    QueryShape('interrupted_run', 'scrape_runs', {'status': 'running', 'started_at': {'$gte': _DATE}},
+               sort={'started_at': -1}, used_by=['ScrapeRun.resume_or_start']),
+    QueryShape('abandoned_runs', 'scrape_runs', {'status': 'running', 'started_at': {'$lt': _DATE}},
+               used_by=['ScrapeRun.resume_or_start']),
+    QueryShape('recent_tweets', 'tweets', {}, sort={'created_at': -1},
+               used_by=['manage_data --list']),
+    QueryShape('tweets_scraped_since', 'tweets', {'scraped_at': {'$gte': _DATE}},
+               used_by=['manage_data --stats']),
+    QueryShape('tweets_created_before', 'tweets', {'created_at': {'$lt': _DATE}},
+               used_by=['manage_data --clean']),
+]
+
+def ensure_indexes(db) -> int:
+    """Create every registered index (no-op for existing ones), returns the number ensured"""
+    ensured = 0
+    for spec in INDEXES:
+        try:
+            db[spec.collection].create_index(spec.keys, **spec.options())
+            ensured += 1
+        except Exception as e:
+            logger.error(f"Failed to ensure index {spec.keys} on {spec.collection}: {e}")
+    return ensured
+
+async def ensure_indexes_async(db) -> int:
+    """ensure_indexes for a motor database"""
+    ensured = 0
+    for spec in INDEXES:
+        try:
+            await db[spec.collection].create_index(spec.keys, **spec.options())
+            ensured += 1
+        except Exception as e:
+            logger.error(f"Failed to ensure index {spec.keys} on {spec.collection}: {e}")
+    return ensured
+
+def _plan_stages(plan) -> List[str]:
+    """Collect the stage names of an explain plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.append(plan['stage'])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(_plan_stages(value))
+    return stages
+
+def explain_query(db, shape: QueryShape) -> List[str]:
+    """Return the stages of the winning plan for a query shape"""
+    command = {'find': shape.collection, 'filter': shape.filter}
+    if shape.sort:
+        command['sort'] = shape.sort
+    if shape.collation:
+        command['collation'] = shape.collation.document
+    result = db.command('explain', command, verbosity='queryPlanner')
+    return _plan_stages(result['queryPlanner']['winningPlan'])
+
+def verify_query_plans(db) -> List[Tuple[QueryShape, List[str]]]:
+    """Explain every registered query shape, returns (shape, stages) pairs"""
+    return [(shape, explain_query(db, shape)) for shape in QUERY_SHAPES]
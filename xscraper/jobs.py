@@ -0,0 +1,319 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ReturnDocument
+from .scraper import XScraper, RETRYABLE_FAILURES
+from .models import ScrapeStats
+from .async_db_manager import AsyncDBManager
+from .cache import TTLCache
+from .events import EventBus, scrape_events, current_job
+from .leases import worker_id
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+# Seconds a running job stays claimed without a heartbeat from its worker
+JOB_LEASE_TTL = 120
+
+# Default high-water mark: the newest tweet stored for the profile
+LATEST_STORED = object()
+
+async def scrape_and_store(scraper, profile_url, database_id, profile_id, db_manager, max_posts=30,
+                           since_id=LATEST_STORED) -> Tuple[int, ScrapeStats]:
+    """Scrape a profile on a pooled page of the shared browser and store results in MongoDB
+
+    Returns the number of posts and the counters of this scrape.
+    """
+    stats = ScrapeStats(profile_url=profile_url)
+    try:
+        # Only scroll back to the newest tweet stored by a previous run
+        if since_id is LATEST_STORED:
+            since_id = await db_manager.get_latest_tweet_id(database_id, profile_id)
+
+        async with scraper.pooled_page() as page:
+            posts = await scraper.scrape_profile(profile_url, max_posts, page=page, since_id=since_id, stats=stats)
+        logger.info(f"Scraped {len(posts)} new posts from {profile_url}")
+
+        if posts:
+            # Store all posts in one bulk upsert
+            started = time.perf_counter()
+            inserted, matched = await db_manager.bulk_upsert_posts(database_id, profile_id, posts, profile_url=profile_url)
+            logger.info(f"Saved {inserted} new and updated {matched} existing posts from {profile_url}")
+            await db_manager.update_database_last_updated(database_id)
+            scraper.events.publish('posts_saved', profile_url=profile_url, saved=inserted, duplicates=matched,
+                                   seconds=round(time.perf_counter() - started, 2))
+
+        # Update profile's last scraped time, also when it had nothing new
+        if posts or stats.stop_reason:
+            await db_manager.update_profile_last_scraped(profile_id, scrape_count=len(posts))
+
+        return len(posts), stats
+
+    except Exception as e:
+        logger.error(f"Error scraping {profile_url}: {str(e)}")
+        return 0, stats
+
+async def profile_since_id(db_manager, profile: Dict) -> Optional[str]:
+    """High-water mark to scrape a profile against
+
+    The newest stored tweet, unless a scrape cut short by its deadline left
+    a gap below the posts it saved; then the mark that scrape started from.
+    """
+    if 'pending_since_id' in profile:
+        return profile['pending_since_id']
+    return await db_manager.get_latest_tweet_id(profile['database_id'], profile['_id'])
+
+async def settle_since_id(db_manager, stats: ScrapeStats, profile: Dict, since_id: Optional[str]):
+    """Keep since_id pending on a profile whose scrape hit its deadline, drop it once a scrape completes"""
+    if stats.stop_reason == 'deadline':
+        if 'pending_since_id' not in profile:
+            await db_manager.set_pending_since_id(profile['_id'], since_id)
+            profile['pending_since_id'] = since_id
+    elif 'pending_since_id' in profile and not scrape_failure(stats):
+        await db_manager.clear_pending_since_id(profile['_id'])
+        del profile['pending_since_id']
+
+def scrape_failure(stats: Optional[ScrapeStats]) -> str:
+    """Failure class of a scrape, '' if it completed"""
+    if stats is None:
+        return 'error'
+    if stats.failure:
+        return stats.failure
+    return '' if stats.stop_reason else 'error'
+
+def job_progress(job: Dict, now: datetime = None) -> Dict:
+    """JSON friendly status of a scrape job, with an ETA while it runs"""
+    now = now or datetime.utcnow()
+    total, done = job.get('profiles_total', 0), job.get('profiles_done', 0)
+
+    eta = None
+    if job['status'] == JOB_RUNNING and job.get('started_at') and done:
+        elapsed = (now - job['started_at']).total_seconds()
+        eta = round(elapsed / done * (total - done))
+
+    def iso(value):
+        return value.isoformat() + 'Z' if value else None
+
+    return {
+        'id': str(job['_id']),
+        'status': job['status'],
+        'profiles_total': total,
+        'profiles_done': done,
+        'posts_saved': job.get('posts_saved', 0),
+        'eta_seconds': eta,
+        'created_at': iso(job.get('created_at')),
+        'started_at': iso(job.get('started_at')),
+        'finished_at': iso(job.get('finished_at')),
+        'error': job.get('error')
+    }
+
+def new_job(profiles: List[Dict], database_id: Optional[ObjectId] = None) -> Dict:
+    """scrape_jobs document for a queued scrape of the given profiles"""
+    return {
+        'status': JOB_QUEUED,
+        'database_id': database_id,
+        'profile_ids': [profile['_id'] for profile in profiles],
+        'profiles_total': len(profiles),
+        'profiles_done': 0,
+        'posts_saved': 0,
+        'created_at': datetime.utcnow(),
+        'started_at': None,
+        'finished_at': None,
+        'error': None
+    }
+
+async def claim_job(db_manager, job_id: Optional[ObjectId] = None, owner: str = None,
+                    ttl: int = JOB_LEASE_TTL) -> Optional[Dict]:
+    """Mark a queued job running and return it, the oldest one unless job_id is given
+
+    The job is leased to `owner` for `ttl` seconds, keep_job_leased()
+    renews the lease while it runs.
+    """
+    query = {'status': JOB_QUEUED}
+    if job_id is not None:
+        query['_id'] = job_id
+    now = datetime.utcnow()
+    return await db_manager.db.scrape_jobs.find_one_and_update(
+        query,
+        {'$set': {
+            'status': JOB_RUNNING,
+            'started_at': now,
+            'lease_owner': owner or worker_id(),
+            'lease_expires': now + timedelta(seconds=ttl)
+        }},
+        sort=[('created_at', 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+async def keep_job_leased(db_manager, job: Dict, ttl: int = JOB_LEASE_TTL):
+    """Renew a running job's lease at a third of the TTL until cancelled"""
+    while True:
+        await asyncio.sleep(ttl / 3)
+        try:
+            await db_manager.db.scrape_jobs.update_one(
+                {'_id': job['_id'], 'lease_owner': job.get('lease_owner')},
+                {'$set': {'lease_expires': datetime.utcnow() + timedelta(seconds=ttl)}}
+            )
+        except Exception as e:
+            logger.error(f"Heartbeat of scrape job {job['_id']} failed: {e}")
+
+async def fail_stale_jobs(db_manager, now: datetime = None) -> int:
+    """Fail running jobs whose worker stopped renewing their lease, returns how many"""
+    now = now or datetime.utcnow()
+    result = await db_manager.db.scrape_jobs.update_many(
+        # A missing lease_expires matches None, covering jobs claimed before leases
+        {'status': JOB_RUNNING, '$or': [{'lease_expires': None}, {'lease_expires': {'$lt': now}}]},
+        {'$set': {'status': JOB_FAILED, 'finished_at': now, 'error': 'Interrupted by restart',
+                  'lease_owner': None, 'lease_expires': None}}
+    )
+    if result.modified_count:
+        logger.warning(f"Marked {result.modified_count} interrupted scrape jobs failed")
+    return result.modified_count
+
+async def finish_job(db_manager, job_id: ObjectId, status: str, error: str = None, events: EventBus = None):
+    """Record the outcome of a job"""
+    await db_manager.db.scrape_jobs.update_one(
+        {'_id': job_id},
+        {'$set': {'status': status, 'finished_at': datetime.utcnow(), 'error': error,
+                  'lease_owner': None, 'lease_expires': None}}
+    )
+    (events or scrape_events).publish('job_finished', job_id=str(job_id), status=status, error=error)
+    logger.info(f"Scrape job {job_id} finished with status {status}")
+
+async def run_scrape_job(job: Dict, scraper, db_manager, max_posts: int = 30) -> str:
+    """Scrape a claimed job's profiles on a launched scraper, returns the final status"""
+    jobs = db_manager.db.scrape_jobs
+    profiles = await db_manager.db.profiles.find({'_id': {'$in': job['profile_ids']}}).to_list(None)
+    # Profiles deleted since the job was queued are not waited for
+    await jobs.update_one({'_id': job['_id']}, {'$set': {'profiles_total': len(profiles)}})
+    logger.info(f"Running scrape job {job['_id']} for {len(profiles)} profiles")
+    scraper.events.publish('job_started', job_id=str(job['_id']), profiles=len(profiles))
+
+    deferred = []  # profiles that timed out or failed, retried once the others are done
+    since_ids = {}  # high-water mark of each profile's first attempt, its retry scrapes down to it again
+
+    async def run(profile, last_attempt=False):
+        if profile['_id'] not in since_ids:
+            since_ids[profile['_id']] = await profile_since_id(db_manager, profile)
+        posts, stats = await scrape_and_store(
+            scraper, profile['url'], profile['database_id'], profile['_id'], db_manager, max_posts,
+            since_id=since_ids[profile['_id']]
+        )
+        await settle_since_id(db_manager, stats, profile, since_ids[profile['_id']])
+        done = 1
+        if not last_attempt and scrape_failure(stats) in RETRYABLE_FAILURES:
+            deferred.append(profile)
+            done = 0
+        await jobs.update_one({'_id': job['_id']}, {'$inc': {'profiles_done': done, 'posts_saved': posts}})
+
+    status, error = JOB_DONE, None
+    heartbeat = asyncio.create_task(keep_job_leased(db_manager, job))
+    # Tag the scraper's events with this job, the tasks gathered below inherit it
+    tagged = current_job.set(str(job['_id']))
+    try:
+        await asyncio.gather(*(run(profile) for profile in profiles))
+        if deferred:
+            logger.info(f"Retrying {len(deferred)} profiles of scrape job {job['_id']}")
+            await asyncio.gather(*(run(profile, last_attempt=True) for profile in deferred))
+    except Exception as e:
+        logger.error(f"Scrape job {job['_id']} failed: {e}", exc_info=True)
+        status, error = JOB_FAILED, str(e)
+    finally:
+        current_job.reset(tagged)
+        heartbeat.cancel()
+
+    await finish_job(db_manager, job['_id'], status, error, scraper.events)
+    return status
+
+class JobQueue:
+    """Runs scrape jobs on a background thread with its own event loop
+
+    Jobs are stored in the scrape_jobs collection, so request handlers
+    only insert a document and return; progress is read back from Mongo.
+    Claimed jobs are leased to this worker and renewed while they run, so
+    several app processes can each run a queue; a running job is only
+    marked failed once its lease expired, i.e. its process is gone.
+    """
+
+    def __init__(self, db, mongo_uri: str, headless: bool = True, max_posts: int = 30, poll_interval: float = 5.0,
+                 cache: Optional[TTLCache] = None):
+        self.db = db  # synchronous database, used from request handlers
+        self.mongo_uri = mongo_uri
+        self.cache = cache  # view cache invalidated by the worker's writes
+        self.headless = headless
+        self.max_posts = max_posts
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.owner = worker_id()
+
+    def submit(self, profiles: List[Dict], database_id: Optional[ObjectId] = None) -> ObjectId:
+        """Queue a scrape of the given profiles, returns the job _id"""
+        job_id = self.db.scrape_jobs.insert_one(new_job(profiles, database_id)).inserted_id
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def get_job(self, job_id: ObjectId) -> Optional[Dict]:
+        """Get a scrape job by _id"""
+        return self.db.scrape_jobs.find_one({'_id': job_id}, {'profile_ids': 0})
+
+    def start(self):
+        """Start the worker thread if it is not running"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='scrape-jobs', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """Ask the worker to stop after the current job"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        asyncio.run(self._worker())
+
+    async def _worker(self):
+        db_manager = AsyncDBManager(self.mongo_uri, cache=self.cache)
+        if not await db_manager.connect():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+            while not self._stopping.is_set():
+                self._wakeup.clear()
+                await fail_stale_jobs(db_manager)
+                job = await claim_job(db_manager, owner=self.owner)
+                if job is None:
+                    await loop.run_in_executor(None, self._wakeup.wait, self.poll_interval)
+                    continue
+                await self._run_job(job, db_manager)
+        except Exception as e:
+            logger.error(f"Scrape job worker error: {e}", exc_info=True)
+        finally:
+            db_manager.close()
+
+    async def _run_job(self, job: Dict, db_manager):
+        scraper = XScraper(headless=self.headless)
+        try:
+            await scraper.init_browser()
+            await run_scrape_job(job, scraper, db_manager, self.max_posts)
+        except Exception as e:
+            logger.error(f"Scrape job {job['_id']} failed: {e}", exc_info=True)
+            await finish_job(db_manager, job['_id'], JOB_FAILED, str(e), scraper.events)
+        finally:
+            try:
+                await scraper.close()
+            except Exception as e:
+                logger.debug(f"Error closing scraper: {e}")
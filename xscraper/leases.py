@@ -0,0 +1,108 @@
+import os
+import uuid
+import socket
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+def worker_id() -> str:
+    """Identify this worker process in lease_owner"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+def claimable_query(now: datetime) -> Dict:
+    """Active profiles that are due and not leased by a live worker"""
+    return {
+        'active': True,
+        '$and': [
+            # A missing field matches None, so never leased or scheduled profiles qualify
+            {'$or': [{'lease_expires': None}, {'lease_expires': {'$lt': now}}]},
+            {'$or': [{'next_scrape_at': None}, {'next_scrape_at': {'$lte': now}}]}
+        ]
+    }
+
+class LeaseQueue:
+    """Hands due profiles to workers through leases on the profile documents
+
+    A claim atomically sets lease_owner and lease_expires, so concurrent
+    workers never get the same profile. heartbeat() extends the leases
+    this worker holds; a crashed worker stops doing so and its profiles
+    become claimable again once lease_expires has passed. Releasing a
+    profile stores its next_scrape_at, which keeps it from being claimed
+    again until it is due.
+    """
+
+    def __init__(self, db_manager, ttl: int = 300, owner: str = None):
+        self.db_manager = db_manager
+        self.ttl = timedelta(seconds=ttl)
+        self.owner = owner or worker_id()
+        self.held = set()  # profile ids leased by this worker
+
+    @property
+    def profiles(self):
+        return self.db_manager.db.profiles
+
+    async def claim(self, now: datetime = None) -> Optional[Dict]:
+        """Lease the most overdue claimable profile, None when nothing is due"""
+        now = now or datetime.utcnow()
+        profile = await self.profiles.find_one_and_update(
+            claimable_query(now),
+            {'$set': {'lease_owner': self.owner, 'lease_expires': now + self.ttl}},
+            sort=[('next_scrape_at', ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+        if profile:
+            self.held.add(profile['_id'])
+        return profile
+
+    async def heartbeat(self, now: datetime = None) -> int:
+        """Extend all leases held by this worker, returns how many were lost"""
+        if not self.held:
+            return 0
+        now = now or datetime.utcnow()
+        held = list(self.held)
+        await self.profiles.update_many(
+            {'_id': {'$in': held}, 'lease_owner': self.owner},
+            {'$set': {'lease_expires': now + self.ttl}}
+        )
+        still_held = {
+            profile['_id'] async for profile in
+            self.profiles.find({'_id': {'$in': held}, 'lease_owner': self.owner}, {'_id': 1})
+        }
+        lost = set(held) - still_held
+        if lost:
+            logger.warning(f"Worker {self.owner} lost the lease on {len(lost)} profiles")
+            self.held -= lost
+        return len(lost)
+
+    async def run_heartbeat(self):
+        """Heartbeat at a third of the lease TTL until cancelled"""
+        interval = self.ttl.total_seconds() / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.error(f"Lease heartbeat failed: {e}")
+
+    async def release(self, profile_id: ObjectId, update: Dict = None) -> bool:
+        """Give a profile back, storing its schedule; False if the lease was already lost"""
+        self.held.discard(profile_id)
+        result = await self.profiles.update_one(
+            {'_id': profile_id, 'lease_owner': self.owner},
+            {'$set': {**(update or {}), 'lease_owner': None, 'lease_expires': None}}
+        )
+        return result.modified_count > 0
+
+    async def release_all(self):
+        """Give back every lease on shutdown, the profiles stay due"""
+        if self.held:
+            await self.profiles.update_many(
+                {'_id': {'$in': list(self.held)}, 'lease_owner': self.owner},
+                {'$set': {'lease_owner': None, 'lease_expires': None}}
+            )
+            self.held.clear()
@@ -8,4 +8,18 @@ class Tweet:
     id: str
     text: str
     created_at: datetime
-    author_username: str
\ No newline at end of file
+    author_username: str
+
+@dataclass
+class ScrapeStats:
+    """Counters collected while scraping a single profile"""
+    profile_url: str
+    raw_extracted: int = 0  # tweet articles parsed, including ones already seen
+    unique_tweets: int = 0
+    known_tweets: int = 0  # tweets at or below the stored high-water mark
+    scrolls: int = 0
+    stop_reason: str = ''
+    failure: str = ''  # 'suspended', 'protected', 'not_found', 'timeout' or 'error'
+    source: str = ''  # 'network' or 'dom'
+    blocked_requests: int = 0
+    est_bytes_saved: int = 0  # blocked requests times typical resource sizes, not measured transfers
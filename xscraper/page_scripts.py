@@ -0,0 +1,146 @@
+"""JavaScript snippets evaluated inside the X timeline page"""
+
+# Parses one tweet article into {id, text, timestamp, author, url}, or null.
+# Shared by the one-shot extraction and the in-page accumulator below.
+_PARSE_ARTICLE_JS = """
+    const parseArticle = (article) => {
+        const time = article.querySelector('time');
+        const link = (time && time.closest('a[href*="/status/"]'))
+            || article.querySelector('a[href*="/status/"]');
+        if (!link) {
+            return null;
+        }
+        const href = link.getAttribute('href') || '';
+        const match = href.match(/\\/([^\\/?#]+)\\/status\\/(\\d+)/);
+        if (!match) {
+            return null;
+        }
+        const textElement = article.querySelector('[data-testid="tweetText"]');
+        return {
+            id: match[2],
+            text: textElement ? textElement.textContent : '',
+            timestamp: time ? time.getAttribute('datetime') : null,
+            author: match[1],
+            url: (link.href || href).split('?')[0]
+        };
+    };
+"""
+
+# Extracts every rendered tweet article in a single page.evaluate() call.
+# Takes the list of tweet IDs already collected and returns
+# {total, tweets}: the number of tweet articles on the page and
+# {id, text, timestamp, author, url} objects for the unseen ones only,
+# so the Python side does not need one IPC round trip per element.
+EXTRACT_TWEETS_JS = """
+(seen) => {%s
+    const known = new Set(seen || []);
+    const tweets = [];
+    let total = 0;
+    for (const article of document.querySelectorAll('article[data-testid="tweet"]')) {
+        const tweet = parseArticle(article);
+        if (!tweet) {
+            continue;
+        }
+        total += 1;
+        if (!known.has(tweet.id)) {
+            known.add(tweet.id);
+            tweets.push(tweet);
+        }
+    }
+    return {total: total, tweets: tweets};
+}
+""" % _PARSE_ARTICLE_JS
+
+# Init script: records every tweet article into window.__xscraperTweets as
+# it renders or changes, so articles the virtualized timeline recycles
+# between two extractions are not lost.
+TWEET_OBSERVER_INIT_JS = """
+(() => {
+    if (window.top !== window || window.__xscraperTweets) {
+        return;
+    }%s
+    const selector = 'article[data-testid="tweet"]';
+    const store = {tweets: new Map()};
+    store.record = (article) => {
+        const tweet = parseArticle(article);
+        if (tweet) {
+            store.tweets.set(tweet.id, tweet);
+        }
+    };
+    store.sweep = () => document.querySelectorAll(selector).forEach(store.record);
+    window.__xscraperTweets = store;
+
+    new MutationObserver((mutations) => {
+        const changed = new Set();
+        for (const mutation of mutations) {
+            const target = mutation.target.nodeType === 1 ? mutation.target : mutation.target.parentElement;
+            const article = target && target.closest(selector);
+            if (article) {
+                changed.add(article);
+            }
+            for (const node of mutation.addedNodes) {
+                if (node.nodeType !== 1) {
+                    continue;
+                }
+                if (node.matches(selector)) {
+                    changed.add(node);
+                } else {
+                    node.querySelectorAll(selector).forEach((found) => changed.add(found));
+                }
+            }
+        }
+        // Record synchronously, before the timeline can recycle the nodes
+        changed.forEach(store.record);
+    }).observe(document, {childList: true, subtree: true, characterData: true});
+})();
+""" % _PARSE_ARTICLE_JS
+
+# Drains the accumulator in one call, returning {total, tweets} like
+# EXTRACT_TWEETS_JS, or null when the init script is not installed.
+DRAIN_TWEETS_JS = """
+(seen) => {
+    const store = window.__xscraperTweets;
+    if (!store) {
+        return null;
+    }
+    store.sweep();
+    const known = new Set(seen || []);
+    const tweets = [];
+    for (const [id, tweet] of store.tweets) {
+        if (!known.has(id)) {
+            tweets.push(tweet);
+        }
+    }
+    const total = store.tweets.size;
+    store.tweets.clear();
+    return {total: total, tweets: tweets};
+}
+"""
+
+# Scrolls the timeline by a multiple of the viewport height and returns a
+# snapshot (article count, last tweet link, page height) to wait against.
+SCROLL_TIMELINE_JS = """
+(viewports) => {
+    const articles = document.querySelectorAll('article[data-testid="tweet"]');
+    const last = articles.length ? articles[articles.length - 1].querySelector('a[href*="/status/"]') : null;
+    const snapshot = {
+        count: articles.length,
+        last: last ? last.getAttribute('href') : null,
+        height: document.body.scrollHeight
+    };
+    window.scrollBy(0, Math.round(window.innerHeight * viewports));
+    return snapshot;
+}
+"""
+
+# Truthy once the timeline rendered something new since the snapshot. The
+# timeline is virtualized, so the last article is compared, not just the count.
+TIMELINE_GREW_JS = """
+(snapshot) => {
+    const articles = document.querySelectorAll('article[data-testid="tweet"]');
+    const last = articles.length ? articles[articles.length - 1].querySelector('a[href*="/status/"]') : null;
+    return articles.length !== snapshot.count
+        || (last ? last.getAttribute('href') : null) !== snapshot.last
+        || document.body.scrollHeight > snapshot.height;
+}
+"""
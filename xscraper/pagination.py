@@ -0,0 +1,112 @@
+import json
+import base64
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from .utils import parse_timestamp
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Newest first; _id breaks ties between records with the same timestamp.
+# Backed by the (database_id, profile_id, timestamp, _id) scraped_data index.
+RECORDS_SORT = [('timestamp', DESCENDING), ('_id', DESCENDING)]
+
+def clamp_page_size(value) -> int:
+    """Parse a requested page size, falling back to the default and capping it"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+def encode_cursor(record: Dict) -> str:
+    """Build an opaque token pointing at a record's (timestamp, _id) position"""
+    timestamp = record.get('timestamp')
+    if isinstance(timestamp, str):
+        # Not yet converted by migrate_string_timestamps
+        timestamp = parse_timestamp(timestamp)
+    position = {
+        't': timestamp.isoformat() if isinstance(timestamp, datetime) else None,
+        'i': str(record['_id'])
+    }
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip('=')
+
+def decode_cursor(token: str) -> Tuple[Optional[datetime], ObjectId]:
+    """Parse a token from encode_cursor, raises ValueError if it is malformed"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        timestamp = datetime.fromisoformat(position['t']) if position['t'] else None
+        return timestamp, ObjectId(position['i'])
+    except Exception as e:
+        raise ValueError(f"Invalid page token: {token}") from e
+
+def _after(timestamp: Optional[datetime], record_id: ObjectId) -> Dict:
+    """Filter for records after a position in RECORDS_SORT order (older)"""
+    if timestamp is None:
+        # Records without timestamp sort last, only the _id can go further
+        return {'timestamp': None, '_id': {'$lt': record_id}}
+    return {'$or': [
+        {'timestamp': {'$lt': timestamp}},
+        {'timestamp': timestamp, '_id': {'$lt': record_id}},
+        {'timestamp': None}
+    ]}
+
+def _before(timestamp: Optional[datetime], record_id: ObjectId) -> Dict:
+    """Filter for records before a position in RECORDS_SORT order (newer)"""
+    if timestamp is None:
+        return {'$or': [
+            {'timestamp': {'$ne': None}},
+            {'timestamp': None, '_id': {'$gt': record_id}}
+        ]}
+    return {'$or': [
+        {'timestamp': {'$gt': timestamp}},
+        {'timestamp': timestamp, '_id': {'$gt': record_id}}
+    ]}
+
+def page_query(query: Dict, after: str = None, before: str = None) -> Tuple[Dict, List]:
+    """Filter and sort selecting the page after/before a token, raises ValueError on a bad token"""
+    if before:
+        timestamp, record_id = decode_cursor(before)
+        return {'$and': [query, _before(timestamp, record_id)]}, [(field, ASCENDING) for field, _ in RECORDS_SORT]
+    if after:
+        timestamp, record_id = decode_cursor(after)
+        query = {'$and': [query, _after(timestamp, record_id)]}
+    return query, RECORDS_SORT
+
+def page_result(records: List[Dict], limit: int, after: str = None,
+                before: str = None) -> Tuple[List[Dict], Optional[str], Optional[str]]:
+    """Turn the limit + 1 records fetched for a page into (records, next_token, prev_token)"""
+    has_more = len(records) > limit
+    records = records[:limit]
+
+    if before:
+        records.reverse()
+        has_newer, has_older = has_more, True
+    else:
+        has_newer, has_older = bool(after), has_more
+
+    next_token = encode_cursor(records[-1]) if records and has_older else None
+    prev_token = encode_cursor(records[0]) if records and has_newer else None
+    return records, next_token, prev_token
+
+def paginate_records(collection, query: Dict, after: str = None, before: str = None,
+                     limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Dict], Optional[str], Optional[str]]:
+    """Fetch one page of records with keyset pagination
+
+    `after` continues to older records, `before` goes back to newer ones.
+    Returns (records, next_token, prev_token); a token is None when there
+    is no page in that direction. Cost does not depend on the page number.
+    """
+    query, sort = page_query(query, after, before)
+    records = list(collection.find(query).sort(sort).limit(limit + 1))
+    return page_result(records, limit, after, before)
+
+async def paginate_records_async(collection, query: Dict, after: str = None, before: str = None,
+                                 limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Dict], Optional[str], Optional[str]]:
+    """paginate_records for a motor collection"""
+    query, sort = page_query(query, after, before)
+    records = await collection.find(query).sort(sort).limit(limit + 1).to_list(None)
+    return page_result(records, limit, after, before)
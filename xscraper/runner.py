@@ -0,0 +1,79 @@
+"""Checkpointed runs over all active profiles, shared by scraper_job.py and scraper_daemon.py
+
+Importing this module has no side effects; the entry points configure logging.
+"""
+import asyncio
+import logging
+import os
+from datetime import timedelta
+from .scraper import RETRYABLE_FAILURES
+from .jobs import scrape_and_store, scrape_failure, profile_since_id, settle_since_id
+from .runs import ScrapeRun
+
+logger = logging.getLogger(__name__)
+
+# MongoDB settings
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://mongodb:27017/xscraper")
+POSTS_LIMIT = int(os.getenv("POSTS_LIMIT", "30"))
+HEADLESS = os.getenv("HEADLESS", "true").lower() == "true"
+
+async def run_all_profiles(scraper, db_manager, profiles):
+    """Scrape the given profiles as one checkpointed run on a launched browser, returns the posts saved"""
+    # Pick up where a recently interrupted run stopped
+    run = await ScrapeRun.resume_or_start(
+        db_manager, profiles, max_age=timedelta(minutes=scraper.config.daemon_interval)
+    )
+    todo = run.remaining(profiles)
+    if run.resumed:
+        logger.info(
+            f"Resuming run {run.id}: skipping {len(profiles) - len(todo)} finished profiles, "
+            f"{len(todo)} left"
+        )
+    
+    total_posts = await visit_all(scraper, todo, db_manager, run)
+    
+    # Profiles that timed out or failed get one more attempt once the rest are done
+    retry = run.failed(todo, RETRYABLE_FAILURES)
+    if retry:
+        logger.info(f"Retrying {len(retry)} profiles that timed out or failed")
+        total_posts += await visit_all(scraper, retry, db_manager, run)
+    
+    await run.finish()
+    logger.info(f"Run {run.id} finished: {run.summary()}")
+    return total_posts
+
+async def visit_all(scraper, profiles, db_manager, run):
+    """Visit profiles concurrently within a run, returns the posts saved"""
+    results = await asyncio.gather(*(
+        checkpointed_visit(scraper, profile, db_manager, run)
+        for profile in profiles
+    ), return_exceptions=True)
+    
+    total_posts = 0
+    for profile, result in zip(profiles, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error processing profile {profile['url']}: {str(result)}")
+            continue
+        total_posts += result
+    return total_posts
+
+async def checkpointed_visit(scraper, profile, db_manager, run):
+    """Scrape and store a profile, checkpointing its progress in the run"""
+    since_id = await run.start_profile(profile['_id'], await profile_since_id(db_manager, profile))
+    try:
+        posts, stats = await scrape_and_store(
+            scraper, profile['url'], profile['database_id'], profile['_id'], db_manager,
+            POSTS_LIMIT, since_id=since_id
+        )
+    except Exception:
+        await run.fail_profile(profile['_id'], 'error')
+        raise
+    # A later run scrapes down to since_id again if the deadline cut this one short
+    await settle_since_id(db_manager, stats, profile, since_id)
+    failure = scrape_failure(stats)
+    if failure:
+        # Posts saved before a deadline stay, the retry scrapes against the same since_id
+        await run.fail_profile(profile['_id'], failure)
+    else:
+        await run.finish_profile(profile['_id'], posts, stats.stop_reason)
+    return posts
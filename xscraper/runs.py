@@ -0,0 +1,152 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+RUN_RUNNING = 'running'
+RUN_DONE = 'done'
+RUN_ABANDONED = 'abandoned'
+
+# Runs older than this are not resumed, defaults to the daemon interval
+RUN_MAX_AGE = timedelta(minutes=360)
+
+PROFILE_PENDING = 'pending'
+PROFILE_RUNNING = 'running'
+PROFILE_DONE = 'done'
+PROFILE_FAILED = 'failed'
+
+def _pending_entry() -> Dict:
+    return {'status': PROFILE_PENDING, 'attempts': 0}
+
+class ScrapeRun:
+    """Checkpoint of a scrape over all active profiles, stored in scrape_runs
+
+    Every profile of the run has an entry with its status and the
+    high-water mark it was first scraped against (since_id). A run left
+    'running' by a crash is resumed by the next one: finished profiles are
+    skipped, and partial ones are scraped again from the top of their
+    timeline against their original since_id, so posts between it and the
+    newest ones saved before the crash are not skipped. Runs
+    older than max_age are abandoned instead, their checkpoints are stale.
+    """
+
+    def __init__(self, db_manager, run: Dict, resumed: bool = False):
+        self.db_manager = db_manager
+        self.run = run
+        self.resumed = resumed
+
+    @property
+    def id(self) -> ObjectId:
+        return self.run['_id']
+
+    @property
+    def runs(self):
+        return self.db_manager.db.scrape_runs
+
+    @classmethod
+    async def resume_or_start(cls, db_manager, profiles: List[Dict],
+                              max_age: timedelta = RUN_MAX_AGE) -> 'ScrapeRun':
+        """Continue a run interrupted within max_age if there is one, otherwise start a new run"""
+        runs = db_manager.db.scrape_runs
+        now = datetime.utcnow()
+        cutoff = now - max_age
+        abandoned = await runs.update_many(
+            {'status': RUN_RUNNING, 'started_at': {'$lt': cutoff}},
+            {'$set': {'status': RUN_ABANDONED, 'finished_at': now}}
+        )
+        if abandoned.modified_count:
+            logger.warning(f"Abandoned {abandoned.modified_count} interrupted runs started before {cutoff:%Y-%m-%d %H:%M}")
+        
+        run = await runs.find_one({'status': RUN_RUNNING, 'started_at': {'$gte': cutoff}}, sort=[('started_at', -1)])
+        if run:
+            # Profiles activated since the run started join it
+            added = {
+                f"profiles.{profile['_id']}": _pending_entry()
+                for profile in profiles if str(profile['_id']) not in run['profiles']
+            }
+            if added:
+                run = await runs.find_one_and_update({'_id': run['_id']}, {'$set': added}, return_document=ReturnDocument.AFTER)
+            return cls(db_manager, run, resumed=True)
+
+        run = {
+            'status': RUN_RUNNING,
+            'started_at': now,
+            'finished_at': None,
+            'profiles': {str(profile['_id']): _pending_entry() for profile in profiles}
+        }
+        run['_id'] = (await runs.insert_one(run)).inserted_id
+        return cls(db_manager, run)
+
+    def entry(self, profile_id: ObjectId) -> Dict:
+        return self.run['profiles'].get(str(profile_id), _pending_entry())
+
+    def remaining(self, profiles: List[Dict]) -> List[Dict]:
+        """Profiles this run has not finished yet"""
+        return [profile for profile in profiles if self.entry(profile['_id'])['status'] != PROFILE_DONE]
+
+    async def start_profile(self, profile_id: ObjectId, latest_id: Optional[str]) -> Optional[str]:
+        """Mark a profile running, returns the since_id to scrape it against
+
+        The first attempt records `latest_id`, later attempts reuse that
+        original high-water mark.
+        """
+        entry = self.entry(profile_id)
+        since_id = entry['since_id'] if 'since_id' in entry else latest_id
+        update = {
+            f"profiles.{profile_id}.status": PROFILE_RUNNING,
+            f"profiles.{profile_id}.since_id": since_id,
+            f"profiles.{profile_id}.started_at": datetime.utcnow()
+        }
+        await self.runs.update_one(
+            {'_id': self.id},
+            {'$set': update, '$inc': {f"profiles.{profile_id}.attempts": 1}}
+        )
+        entry.update(status=PROFILE_RUNNING, since_id=since_id)
+        self.run['profiles'][str(profile_id)] = entry
+        return since_id
+
+    async def finish_profile(self, profile_id: ObjectId, posts: int, stop_reason: str):
+        """Checkpoint a profile whose posts are stored"""
+        await self._set_profile(profile_id, {
+            'status': PROFILE_DONE,
+            'posts': posts,
+            'stop_reason': stop_reason,
+            'failure': '',
+            'finished_at': datetime.utcnow()
+        })
+
+    async def fail_profile(self, profile_id: ObjectId, failure: str = 'error'):
+        """Record a failed profile with its failure class, it is retried by the next run"""
+        await self._set_profile(profile_id, {'status': PROFILE_FAILED, 'failure': failure})
+
+    def failed(self, profiles: List[Dict], failures) -> List[Dict]:
+        """Profiles of this run that failed with one of the given failure classes"""
+        return [
+            profile for profile in profiles
+            if self.entry(profile['_id'])['status'] == PROFILE_FAILED
+            and self.entry(profile['_id']).get('failure') in failures
+        ]
+
+    async def _set_profile(self, profile_id: ObjectId, fields: Dict):
+        await self.runs.update_one(
+            {'_id': self.id},
+            {'$set': {f"profiles.{profile_id}.{key}": value for key, value in fields.items()}}
+        )
+        self.run['profiles'].setdefault(str(profile_id), _pending_entry()).update(fields)
+
+    async def finish(self):
+        """Close the run, failed profiles start over in the next run"""
+        await self.runs.update_one(
+            {'_id': self.id},
+            {'$set': {'status': RUN_DONE, 'finished_at': datetime.utcnow()}}
+        )
+
+    def summary(self) -> Dict[str, int]:
+        """Number of profiles per status"""
+        counts = {}
+        for entry in self.run['profiles'].values():
+            counts[entry['status']] = counts.get(entry['status'], 0) + 1
+        return counts
@@ -0,0 +1,124 @@
+import heapq
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from .config import Config
+
+# Scraped history used to seed the rate of profiles never scheduled before
+HISTORY_WINDOW = timedelta(days=14)
+# Weight of the latest observation in the smoothed posting rate
+RATE_SMOOTHING = 0.5
+
+def history_rate(recent_posts: int, window: timedelta = HISTORY_WINDOW) -> float:
+    """Posts per hour from the number of stored posts published within window"""
+    return recent_posts / (window.total_seconds() / 3600)
+
+def observed_rate(post_count: int, previous_scrape: Optional[datetime], now: datetime) -> Optional[float]:
+    """Posts per hour seen by a scrape, None without a previous scrape to measure from"""
+    if previous_scrape is None:
+        return None
+    hours = (now - previous_scrape).total_seconds() / 3600
+    return post_count / hours if hours > 0 else None
+
+def blend_rate(previous: Optional[float], observed: Optional[float], smoothing: float = RATE_SMOOTHING) -> float:
+    """Exponentially smoothed posting rate"""
+    if observed is None:
+        return previous or 0.0
+    if previous is None:
+        return observed
+    return smoothing * observed + (1 - smoothing) * previous
+
+def next_interval(rate: float, config: Config, saturated: bool = False) -> timedelta:
+    """Time until a profile posting `rate` posts/hour has schedule_target_posts new posts
+
+    A saturated scrape (stopped at posts_limit) may have missed posts, so
+    the profile is visited at the minimum interval.
+    """
+    minimum = timedelta(minutes=config.schedule_min_interval)
+    maximum = timedelta(minutes=config.schedule_max_interval)
+    if saturated:
+        return minimum
+    if rate <= 0:
+        return maximum
+    return max(minimum, min(maximum, timedelta(hours=config.schedule_target_posts / rate)))
+
+def plan_next_visit(profile: Dict, post_count: Optional[int], now: datetime, config: Config,
+                    saturated: bool = False) -> Dict:
+    """next_scrape_at and post_rate of a profile after a visit
+
+    `post_count` is the number of new posts the visit found, None if it
+    failed; a failed visit is retried after the minimum interval
+    without touching the rate.
+    """
+    rate = profile.get('post_rate')
+    if post_count is None:
+        interval = timedelta(minutes=config.schedule_min_interval)
+    else:
+        rate = blend_rate(rate, observed_rate(post_count, profile.get('last_scraped'), now))
+        interval = next_interval(rate, config, saturated)
+    return {'next_scrape_at': now + interval, 'post_rate': rate}
+
+class AdaptiveScheduler:
+    """Priority queue of profiles ordered by their next due time
+
+    Profiles are handed out when due, at most config.scrape_budget_per_hour
+    per hour (a token bucket holding five minutes of budget), most overdue
+    first. After a visit reschedule() turns the posting rate into the
+    next due time.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self._heap: List[Tuple[datetime, ObjectId]] = []
+        self._profiles: Dict[ObjectId, Dict] = {}
+        self._capacity = max(1.0, config.scrape_budget_per_hour / 12)
+        self._tokens = self._capacity
+        self._refilled_at = None
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def load(self, profiles: List[Dict], now: datetime):
+        """Replace the queue with the given active profiles, never scheduled ones are due now"""
+        self._profiles = {profile['_id']: profile for profile in profiles}
+        self._heap = [(profile.get('next_scrape_at') or now, profile['_id']) for profile in profiles]
+        heapq.heapify(self._heap)
+
+    def _refill(self, now: datetime):
+        if self._refilled_at is not None:
+            hours = (now - self._refilled_at).total_seconds() / 3600
+            self._tokens = min(self._capacity, self._tokens + hours * self.config.scrape_budget_per_hour)
+        self._refilled_at = now
+
+    def take_due(self, now: datetime) -> List[Dict]:
+        """Pop due profiles the budget allows right now"""
+        self._refill(now)
+        due = []
+        while self._heap and self._heap[0][0] <= now and self._tokens >= 1:
+            _, profile_id = heapq.heappop(self._heap)
+            profile = self._profiles.get(profile_id)
+            if profile is None:
+                continue
+            self._tokens -= 1
+            due.append(profile)
+        return due
+
+    def seconds_until_next(self, now: datetime) -> Optional[float]:
+        """Seconds until take_due can return a profile, None if the queue is empty"""
+        if not self._heap:
+            return None
+        wait = max(0.0, (self._heap[0][0] - now).total_seconds())
+        if self._tokens < 1:
+            wait = max(wait, (1 - self._tokens) / self.config.scrape_budget_per_hour * 3600)
+        return wait
+
+    def reschedule(self, profile: Dict, post_count: Optional[int], now: datetime,
+                   saturated: bool = False) -> Dict:
+        """Queue a visited profile again, returns the fields to persist on it"""
+        update = plan_next_visit(profile, post_count, now, self.config, saturated)
+        profile.update(update)
+        if post_count is not None:
+            profile['last_scraped'] = now
+        if profile['_id'] in self._profiles:
+            heapq.heappush(self._heap, (update['next_scrape_at'], profile['_id']))
+        return update
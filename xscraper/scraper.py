@@ -1,22 +1,41 @@
 from datetime import datetime
 import logging
 import asyncio
-from typing import List, Optional
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
-from .models import Tweet
+from .models import Tweet, ScrapeStats
 from .auth import BrowserAuth
 from .db_manager import DBManager
 from .config import Config
+from .page_scripts import DRAIN_TWEETS_JS, EXTRACT_TWEETS_JS, SCROLL_TIMELINE_JS, TIMELINE_GREW_JS
+from .timeline import TimelineCapture
+from .events import EventBus, scrape_events
+
+# Empty state texts of profiles that have no timeline to scrape
+UNAVAILABLE_MARKERS = {
+    'suspended': ('account suspended',),
+    'protected': ('posts are protected', 'tweets are protected'),
+    'not_found': ("account doesn't exist",),
+}
+# Failures worth another attempt later in the same run
+RETRYABLE_FAILURES = ('timeout', 'error')
 
 class XScraper:
     """Scrapes posts from X (Twitter) profiles"""
     
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, events: Optional[EventBus] = None):
         self.config = Config.from_env()  # Use from_env instead of direct instantiation
         self.config.headless = headless  # Override headless setting if provided
         self.auth = None
         self.logger = logging.getLogger(__name__)
         self.rate_limit_delay = 1.0  # seconds between requests
+        self._idle_pages = []  # pooled pages reused between profiles
+        self._page_slots = None  # bounds concurrently open pages
+        self.stats: Dict[str, ScrapeStats] = {}  # last scrape counters per profile URL, for diagnostics
+        self.events = events or scrape_events  # live progress for the web app
         
     async def init_browser(self):
         """Initialize browser with authentication"""
@@ -24,8 +43,28 @@ class XScraper:
         await self.auth.__aenter__()
         return self
         
+    async def ensure_browser(self) -> bool:
+        """Relaunch the browser if it was closed or crashed, returns True if it was relaunched"""
+        if self.auth and self.auth.browser and self.auth.browser.is_connected():
+            return False
+        if self.auth:
+            self.logger.warning("Browser disconnected, relaunching")
+            try:
+                await self.close()
+            except Exception as e:
+                self.logger.debug(f"Error closing disconnected browser: {e}")
+        self._idle_pages = []
+        await self.init_browser()
+        return True
+        
     async def close(self):
         """Close browser and cleanup resources"""
+        while self._idle_pages:
+            page = self._idle_pages.pop()
+            try:
+                await page.close()
+            except Exception as e:
+                self.logger.debug(f"Error closing pooled page: {e}")
         if self.auth:
             await self.auth.__aexit__(None, None, None)
         
@@ -33,78 +72,249 @@ class XScraper:
         """Implement rate limiting between requests"""
         await asyncio.sleep(self.rate_limit_delay)
         
-    async def scrape_profile(self, profile_url: str, max_posts: int = 30) -> List[dict]:
-        """Scrape recent posts from a profile"""
-        await self._respect_rate_limit()
-        posts = []
-        page = self.auth.page
+    async def _acquire_page(self):
+        """Take an idle pooled page, opening a new one in the shared context if needed"""
+        if self._idle_pages:
+            return self._idle_pages.pop()
+        return await self.auth.context.new_page()
         
+    async def _release_page(self, page):
+        """Reset a page and return it to the pool so the next profile can reuse it"""
+        if page.is_closed():
+            return
         try:
-            # Navigate to profile
-            await page.goto(profile_url)
-            await page.wait_for_selector('[data-testid="primaryColumn"]')
+            # Drop the previous timeline DOM before the page sits idle
+            await page.goto('about:blank')
+            self._idle_pages.append(page)
+        except Exception as e:
+            self.logger.debug(f"Discarding pooled page: {e}")
+            await page.close()
             
-            # Scroll and collect posts until we have enough
-            while len(posts) < max_posts:
-                new_posts = await self._extract_tweets()
-                posts.extend(new_posts)
-                
-                # Break if we got enough posts
-                if len(posts) >= max_posts:
-                    break
-                    
-                # Scroll for more posts
-                await page.evaluate('window.scrollBy(0, 1000)')
-                await page.wait_for_timeout(1000)
+    @asynccontextmanager
+    async def pooled_page(self):
+        """Borrow a page from the shared browser, bounded by max_concurrency"""
+        if self._page_slots is None:
+            self._page_slots = asyncio.Semaphore(max(1, self.config.max_concurrency))
+        async with self._page_slots:
+            page = await self._acquire_page()
+            try:
+                yield page
+            finally:
+                await self._release_page(page)
+            
+    async def scrape_profile(self, profile_url: str, max_posts: int = 30, page=None,
+                             since_id: Optional[str] = None, stats: Optional[ScrapeStats] = None) -> List[dict]:
+        """Scrape recent posts from a profile
+        
+        Tweets are collected by ID so articles still on screen after a scroll
+        are not extracted twice. Scrolling stops once max_posts unique tweets
+        were found or after config.max_stale_scrolls scrolls without new ones.
+        
+        With config.extraction_mode 'network' tweets are parsed from the
+        timeline API responses the page receives; the DOM is only read when
+        no timeline tweets were captured.
+        
+        If `since_id` (the newest tweet ID already stored) is given, tweets at
+        or below it are skipped and scrolling stops once
+        config.high_water_overlap of them were seen, so a pinned old tweet
+        does not end the scrape early.
+        
+        The whole scrape is bounded by config.profile_budget seconds; posts
+        found before the deadline are returned with stop_reason 'deadline'.
+        Failed or cut short scrapes are classified in stats.failure.
+        
+        Counters go to `stats` when given, so concurrent scrapes of the same
+        URL (one profile tracked in two databases) keep their own results.
+        """
+        await self._respect_rate_limit()
+        seen = set()
+        posts = {}  # tweet id -> post, in timeline order
+        page = page or self.auth.page
+        stats = stats or ScrapeStats(profile_url=profile_url)
+        self.stats[profile_url] = stats
+        high_water = int(since_id) if since_id else None
+        capture = TimelineCapture(page) if self.config.extraction_mode == 'network' else None
+        self.auth.take_blocked_counters(page)
+        started = time.perf_counter()
+        self.events.publish('profile_started', profile_url=profile_url, since_id=since_id)
+        
+        try:
+            try:
+                await asyncio.wait_for(
+                    self._scrape_timeline(page, profile_url, max_posts, high_water, capture, seen, posts, stats),
+                    self.config.profile_budget
+                )
+            except asyncio.TimeoutError:
+                stats.stop_reason = 'deadline'
+                stats.failure = 'timeout'
+                self.logger.warning(
+                    f"{profile_url}: budget of {self.config.profile_budget}s used up, "
+                    f"keeping {len(posts)} posts"
+                )
+            if not stats.stop_reason:
+                # The timeline never rendered, see whether the profile is gone
+                stats.failure = await self._unavailable_reason(page) or 'error'
+                self.logger.warning(f"{profile_url}: no timeline ({stats.failure})")
+                self.events.publish('profile_failed', profile_url=profile_url, failure=stats.failure,
+                                    seconds=round(time.perf_counter() - started, 2))
+                return []
                 
+            stats.unique_tweets = len(seen)
+            stats.source = 'network' if capture and capture.parsed else 'dom'
+            stats.blocked_requests, stats.est_bytes_saved = self.auth.take_blocked_counters(page)
+            self.logger.info(
+                f"{profile_url}: {len(posts)} new of {stats.unique_tweets} unique tweets from "
+                f"{stats.raw_extracted} raw {stats.source} extractions over {stats.scrolls} scrolls "
+                f"({stats.stop_reason}); blocked {stats.blocked_requests} requests, "
+                f"~{stats.est_bytes_saved / 1024:.0f} KB saved (estimated from typical resource sizes)"
+            )
+            self.events.publish('profile_scraped', profile_url=profile_url, posts=min(len(posts), max_posts),
+                                unique=stats.unique_tweets, scrolls=stats.scrolls, source=stats.source,
+                                stop_reason=stats.stop_reason,
+                                seconds=round(time.perf_counter() - started, 2))
+            
             # Convert to dictionary format expected by web app
             formatted_posts = []
-            for post in posts[:max_posts]:
+            for post in list(posts.values())[:max_posts]:
                 formatted_posts.append({
                     'id': str(post['id']),
                     'text': post['text'],
                     'timestamp': post['created_at'].isoformat() + 'Z',
-                    'url': f"{profile_url}/status/{post['id']}"
+                    'author_username': post['author'],
+                    'url': post['url'] or f"{profile_url}/status/{post['id']}"
                 })
                 
             return formatted_posts
             
         except Exception as e:
-            self.logger.error(f"Error scraping profile {profile_url}: {e}")
+            stats.stop_reason = ''
+            stats.failure = await self._unavailable_reason(page) or (
+                'timeout' if isinstance(e, PlaywrightTimeoutError) else 'error'
+            )
+            self.logger.error(f"Error scraping profile {profile_url} ({stats.failure}): {e}")
+            self.events.publish('profile_failed', profile_url=profile_url, error=str(e), failure=stats.failure,
+                                seconds=round(time.perf_counter() - started, 2))
             return []
             
-    async def _extract_tweets(self) -> List[dict]:
-        """Extract tweets from current page"""
-        tweets = []
-        elements = await self.auth.page.query_selector_all('article[data-testid="tweet"]')
+        finally:
+            if capture:
+                capture.detach()
+                
+    async def _scrape_timeline(self, page, profile_url: str, max_posts: int, high_water: Optional[int],
+                               capture, seen: set, posts: Dict[str, dict], stats: ScrapeStats):
+        """Open a profile and scroll its timeline, collecting new tweets into `posts`
         
-        for element in elements:
-            try:
-                # Get tweet ID from article
-                tweet_link = await element.query_selector('a[href*="/status/"]')
-                if not tweet_link:
+        Sets stats.stop_reason when scrolling ended normally. Page loads are
+        bounded by config.navigation_timeout and the timeline column by
+        config.timeline_timeout; an unavailable profile returns without one.
+        """
+        # Navigate to profile
+        await page.goto(profile_url, timeout=self.config.navigation_timeout)
+        await page.wait_for_selector('[data-testid="primaryColumn"]', timeout=self.config.timeline_timeout)
+        if await self._unavailable_reason(page):
+            return
+        
+        # Scroll and collect posts until we have enough
+        stale_scrolls = 0
+        while True:
+            total, new_posts = await self._collect_tweets(page, capture, seen)
+            stats.raw_extracted += total
+            for post in new_posts:
+                seen.add(post['id'])
+                if high_water is not None and int(post['id']) <= high_water:
+                    stats.known_tweets += 1
                     continue
-                    
-                href = await tweet_link.get_attribute('href')
-                tweet_id = href.split('/status/')[1].split('?')[0]
+                posts.setdefault(post['id'], post)
+            if new_posts:
+                self.events.publish('tweets_found', profile_url=profile_url,
+                                    new=len(new_posts), total=len(posts), scrolls=stats.scrolls)
+            
+            # Break if we got enough posts
+            if len(posts) >= max_posts:
+                stats.stop_reason = 'limit'
+                break
+                
+            # Break once we are back at tweets stored by a previous run
+            if high_water is not None and stats.known_tweets >= self.config.high_water_overlap:
+                stats.stop_reason = 'caught_up'
+                break
                 
-                # Get tweet text
-                text_element = await element.query_selector('[data-testid="tweetText"]')
-                text = await text_element.text_content() if text_element else ""
+            # Break if the timeline stopped growing
+            stale_scrolls = 0 if new_posts else stale_scrolls + 1
+            if stale_scrolls >= self.config.max_stale_scrolls:
+                stats.stop_reason = 'stagnated'
+                break
                 
-                # Get timestamp
-                time_element = await element.query_selector('time')
-                timestamp = await time_element.get_attribute('datetime') if time_element else None
+            # Scroll for more posts
+            await self._scroll_and_wait(page)
+            stats.scrolls += 1
+            
+    async def _unavailable_reason(self, page) -> Optional[str]:
+        """'suspended', 'protected' or 'not_found' if the profile page shows that instead of a timeline"""
+        try:
+            element = await page.query_selector('[data-testid="emptyState"]')
+            text = (await element.inner_text()).lower().replace('\u2019', "'") if element else ''
+        except Exception:
+            return None
+        for reason, markers in UNAVAILABLE_MARKERS.items():
+            if any(marker in text for marker in markers):
+                return reason
+        return None
+            
+    async def _scroll_and_wait(self, page) -> bool:
+        """Scroll the timeline and wait until new tweets render
+        
+        Returns as soon as the timeline changed, or False after
+        config.scroll_wait_timeout milliseconds without change.
+        """
+        snapshot = await page.evaluate(SCROLL_TIMELINE_JS, self.config.scroll_viewports)
+        try:
+            await page.wait_for_function(TIMELINE_GREW_JS, arg=snapshot,
+                                         timeout=self.config.scroll_wait_timeout)
+            return True
+        except PlaywrightTimeoutError:
+            return False
+            
+    async def _collect_tweets(self, page, capture, seen) -> Tuple[int, List[dict]]:
+        """Take unseen tweets from captured timeline responses, falling back to the DOM"""
+        if capture:
+            total, tweets = await capture.drain(seen)
+            if capture.parsed:
+                return total, tweets
+        return await self._extract_tweets(page, seen=seen)
+        
+    async def _extract_tweets(self, page=None, seen=()) -> Tuple[int, List[dict]]:
+        """Extract unseen tweets from current page in a single evaluate round trip
+        
+        With config.tweet_observer the in-page accumulator is drained, which
+        also holds articles the timeline already removed from the DOM.
+        Returns the number of tweets extracted and those whose IDs are not
+        in `seen`.
+        """
+        tweets = []
+        page = page or self.auth.page
+        result = None
+        if self.config.tweet_observer:
+            result = await page.evaluate(DRAIN_TWEETS_JS, list(seen))
+        if result is None:
+            result = await page.evaluate(EXTRACT_TWEETS_JS, list(seen))
+        raw_tweets = result['tweets']
+        
+        for raw in raw_tweets:
+            try:
+                timestamp = raw.get('timestamp')
                 created_at = datetime.fromisoformat(timestamp.replace('Z', '+00:00')) if timestamp else datetime.utcnow()
                 
                 tweets.append({
-                    'id': tweet_id,
-                    'text': text,
-                    'created_at': created_at
+                    'id': raw['id'],
+                    'text': raw.get('text') or "",
+                    'created_at': created_at,
+                    'author': raw.get('author'),
+                    'url': raw.get('url')
                 })
                 
             except Exception as e:
                 self.logger.error(f"Error extracting tweet: {e}")
                 continue
                 
-        return tweets
\ No newline at end of file
+        return result['total'], tweets
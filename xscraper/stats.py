@@ -0,0 +1,109 @@
+from typing import Dict, List
+from bson import ObjectId
+
+def database_counts_pipeline() -> List[Dict]:
+    """Aggregation on profiles giving profile, active profile and record counts per database
+
+    Profile counts and scraped_data record counts are grouped in the same
+    pipeline via $unionWith, so the whole dashboard costs one query.
+    """
+    return [
+        {'$group': {
+            '_id': '$database_id',
+            'profile_count': {'$sum': 1},
+            'active_profiles': {'$sum': {'$cond': [{'$ifNull': ['$active', True]}, 1, 0]}},
+            'record_count': {'$sum': 0}
+        }},
+        {'$unionWith': {
+            'coll': 'scraped_data',
+            'pipeline': [
+                {'$group': {
+                    '_id': '$database_id',
+                    'profile_count': {'$sum': 0},
+                    'active_profiles': {'$sum': 0},
+                    'record_count': {'$sum': 1}
+                }}
+            ]
+        }},
+        {'$group': {
+            '_id': '$_id',
+            'profile_count': {'$sum': '$profile_count'},
+            'active_profiles': {'$sum': '$active_profiles'},
+            'record_count': {'$sum': '$record_count'}
+        }}
+    ]
+
+def profile_record_counts_pipeline(database_id: ObjectId) -> List[Dict]:
+    """Aggregation on scraped_data giving the record count per profile of a database"""
+    return [
+        {'$match': {'database_id': database_id}},
+        {'$group': {'_id': '$profile_id', 'record_count': {'$sum': 1}}}
+    ]
+
+def database_counts(db) -> Dict[ObjectId, Dict[str, int]]:
+    """Get profile_count, active_profiles and record_count keyed by database _id"""
+    return {
+        row['_id']: {
+            'profile_count': row['profile_count'],
+            'active_profiles': row['active_profiles'],
+            'record_count': row['record_count']
+        }
+        for row in db.profiles.aggregate(database_counts_pipeline())
+    }
+
+def profile_record_counts(db, database_id: ObjectId) -> Dict[ObjectId, int]:
+    """Get the number of scraped records keyed by profile _id for a database"""
+    return {
+        row['_id']: row['record_count']
+        for row in db.scraped_data.aggregate(profile_record_counts_pipeline(database_id))
+    }
+
+def overview_entry(database: Dict) -> Dict:
+    """Dashboard fields of a game_databases document"""
+    return {
+        '_id': database['_id'],
+        'name': database['name'],
+        'slug': database['slug'],
+        'profile_count': database.get('profile_count', 0),
+        'active_profiles': database.get('active_profiles', 0),
+        'record_count': database.get('record_count', 0),
+        'last_updated': database.get('last_updated')
+    }
+
+def database_overview(db) -> List[Dict]:
+    """Get all game databases with their profile and record counts
+
+    Counts come from the counters maintained on game_databases documents,
+    so the cost does not grow with scraped_data.
+    """
+    return [overview_entry(database) for database in db.game_databases.find()]
+
+def counters_missing(db) -> bool:
+    """Check if any database or profile predates the maintained counters"""
+    return bool(
+        db.game_databases.find_one({'record_count': {'$exists': False}}, {'_id': 1})
+        or db.profiles.find_one({'record_count': {'$exists': False}}, {'_id': 1})
+    )
+
+def reconcile_counters(db, dry_run: bool = False) -> int:
+    """Recompute all counters from the data and repair drifted ones
+
+    Returns the number of documents whose counters were (or would be) fixed.
+    """
+    fixed = 0
+    counts = database_counts(db)
+    for database in db.game_databases.find():
+        expected = counts.get(database['_id'], {'profile_count': 0, 'active_profiles': 0, 'record_count': 0})
+        if any(database.get(key) != value for key, value in expected.items()):
+            fixed += 1
+            if not dry_run:
+                db.game_databases.update_one({'_id': database['_id']}, {'$set': expected})
+
+        record_counts = profile_record_counts(db, database['_id'])
+        for profile in db.profiles.find({'database_id': database['_id']}, {'record_count': 1}):
+            expected_records = record_counts.get(profile['_id'], 0)
+            if profile.get('record_count') != expected_records:
+                fixed += 1
+                if not dry_run:
+                    db.profiles.update_one({'_id': profile['_id']}, {'$set': {'record_count': expected_records}})
+    return fixed
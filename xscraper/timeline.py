@@ -0,0 +1,133 @@
+import re
+import asyncio
+import logging
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# GraphQL operations that carry a profile's timeline
+TIMELINE_OPERATIONS = ('UserTweets', 'UserTweetsAndReplies', 'UserMedia')
+TIMELINE_URL_PATTERN = re.compile(r'/graphql/[^/]+/(%s)(\?|$)' % '|'.join(TIMELINE_OPERATIONS))
+
+def is_timeline_response(url: str) -> bool:
+    """Check if a response URL is a profile timeline GraphQL call"""
+    return bool(TIMELINE_URL_PATTERN.search(url))
+
+def parse_created_at(value: str) -> Optional[datetime]:
+    """Parse the legacy API date format, e.g. 'Wed Oct 10 20:19:24 +0000 2018'"""
+    try:
+        return datetime.strptime(value, '%a %b %d %H:%M:%S %z %Y')
+    except (TypeError, ValueError):
+        return None
+
+def _timeline_instructions(payload: dict) -> List[dict]:
+    """Find the instruction list of a UserTweets style payload"""
+    result = ((payload.get('data') or {}).get('user') or {}).get('result') or {}
+    for key in ('timeline_v2', 'timeline'):
+        timeline = (result.get(key) or {}).get('timeline') or {}
+        if 'instructions' in timeline:
+            return timeline['instructions']
+    return []
+
+def _timeline_entries(payload: dict) -> Iterator[dict]:
+    """Yield timeline entries in display order, pinned entry included"""
+    for instruction in _timeline_instructions(payload):
+        if 'entry' in instruction:
+            yield instruction['entry']
+        for entry in instruction.get('entries', []):
+            yield entry
+
+def _entry_tweet_results(entry: dict) -> Iterator[dict]:
+    """Yield tweet results of a single tweet entry or a conversation module"""
+    content = entry.get('content') or {}
+    item_contents = [content.get('itemContent')]
+    item_contents += [(item.get('item') or {}).get('itemContent') for item in content.get('items', [])]
+    for item_content in item_contents:
+        result = ((item_content or {}).get('tweet_results') or {}).get('result')
+        if result:
+            yield result
+
+def parse_tweet_result(result: dict) -> Optional[dict]:
+    """Convert a GraphQL tweet result into the scraper's tweet dict"""
+    # Tweets with visibility limits wrap the actual tweet
+    if result.get('__typename') == 'TweetWithVisibilityResults':
+        result = result.get('tweet') or {}
+    legacy = result.get('legacy')
+    if not legacy:
+        return None
+
+    tweet_id = legacy.get('id_str') or result.get('rest_id')
+    if not tweet_id:
+        return None
+
+    # Long tweets keep their full text in note_tweet
+    note = ((result.get('note_tweet') or {}).get('note_tweet_results') or {}).get('result') or {}
+    text = note.get('text') or legacy.get('full_text') or ''
+
+    user = ((result.get('core') or {}).get('user_results') or {}).get('result') or {}
+    author = ((user.get('legacy') or {}).get('screen_name')
+              or (user.get('core') or {}).get('screen_name'))
+
+    return {
+        'id': tweet_id,
+        'text': text,
+        'created_at': parse_created_at(legacy.get('created_at')) or datetime.utcnow(),
+        'author': author,
+        'url': f"https://x.com/{author}/status/{tweet_id}" if author else None
+    }
+
+def parse_timeline_payload(payload: dict) -> List[dict]:
+    """Extract tweets from a timeline GraphQL payload in timeline order"""
+    tweets = []
+    for entry in _timeline_entries(payload):
+        for result in _entry_tweet_results(entry):
+            try:
+                tweet = parse_tweet_result(result)
+            except Exception as e:
+                logger.error(f"Error parsing timeline tweet: {e}")
+                continue
+            if tweet:
+                tweets.append(tweet)
+    return tweets
+
+class TimelineCapture:
+    """Collects tweets from the timeline API responses a page receives"""
+
+    def __init__(self, page):
+        self.page = page
+        self.responses = 0  # timeline responses received
+        self.parsed = 0  # tweets parsed from them
+        self._tweets = {}  # tweet id -> tweet, in arrival order
+        self._pending = set()
+        page.on('response', self._on_response)
+
+    def _on_response(self, response):
+        if not is_timeline_response(response.url):
+            return
+        task = asyncio.ensure_future(self._parse_response(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _parse_response(self, response):
+        try:
+            payload = await response.json()
+        except Exception as e:
+            logger.debug(f"Could not read timeline response {response.url}: {e}")
+            return
+        self.responses += 1
+        for tweet in parse_timeline_payload(payload):
+            self.parsed += 1
+            self._tweets.setdefault(tweet['id'], tweet)
+
+    async def drain(self, seen=()) -> Tuple[int, List[dict]]:
+        """Return (tweets captured since last drain, those not in `seen`)"""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        tweets = list(self._tweets.values())
+        self._tweets = {}
+        return len(tweets), [tweet for tweet in tweets if tweet['id'] not in seen]
+
+    def detach(self):
+        """Stop listening, so a pooled page can be reused"""
+        self.page.remove_listener('response', self._on_response)
@@ -1,5 +1,6 @@
 import re
 import logging
+from datetime import datetime
 from urllib.parse import urlparse, urljoin
 
 logger = logging.getLogger(__name__)
@@ -72,4 +73,16 @@ def is_valid_x_url(url):
             
         return True
     except Exception:
-        return False
\ No newline at end of file
+        return False
+
+def parse_timestamp(timestamp_str: str) -> datetime:
+    """Safely parse ISO format timestamp string"""
+    try:
+        # Remove any existing timezone info and replace with UTC
+        clean_ts = timestamp_str.split('+')[0].rstrip('Z')
+        if not clean_ts.endswith('.'):  # Ensure we don't have a trailing dot
+            clean_ts = clean_ts.rstrip('.')
+        return datetime.fromisoformat(clean_ts + '+00:00')
+    except Exception as e:
+        logger.error(f"Error parsing timestamp {timestamp_str}: {e}")
+        return datetime.utcnow()
@@ -0,0 +1,119 @@
+"""View helpers shared by the Flask (web_app.py) and Quart (asgi_app.py) front ends
+
+The apps only differ in how they reach MongoDB (pymongo or motor) and
+in awaiting the framework calls; page data, API payloads, ETags, form
+validation and flash messages are built here once.
+"""
+from typing import Dict, List, Optional, Tuple
+from .api import serialize_document, make_etag, records_etag
+from .jobs import JOB_DONE, JOB_FAILED
+from .pagination import clamp_page_size
+from .utils import normalize_x_url, is_valid_x_url
+
+# Flash messages of the page routes as (message, category)
+FLASH = {
+    'dashboard_error': ('An error occurred while loading the dashboard', 'danger'),
+    'no_active_profiles': ('No active profiles found', 'warning'),
+    'scrape_error': ('An error occurred while queueing the scrape', 'danger'),
+    'database_added': ('Database added successfully', 'success'),
+    'database_deleted': ('Database deleted successfully', 'success'),
+    'database_exists': ('A database with this slug already exists', 'danger'),
+    'database_fields_required': ('Name and slug are required', 'danger'),
+    'database_not_found': ('Database not found', 'danger'),
+    'databases_error': ('An error occurred while loading databases', 'danger'),
+    'database_error': ('An error occurred while loading the database', 'danger'),
+    'profile_not_found': ('Profile not found', 'danger'),
+    'invalid_page': ('Invalid page, showing the newest records', 'warning'),
+    'records_error': ('An error occurred while loading the records', 'danger'),
+    'profile_url_required': ('Profile URL is required', 'danger'),
+    'profile_url_invalid': ('Invalid X/Twitter profile URL', 'danger'),
+    'profile_exists': ('Profile already exists in this database', 'warning'),
+    'profile_added': ('Profile added successfully', 'success'),
+    'profile_add_error': ('An error occurred while adding the profile', 'danger'),
+    'profile_toggle_error': ('An error occurred while toggling the profile', 'danger'),
+    'profile_deleted': ('Profile deleted successfully', 'success'),
+    'profile_delete_error': ('An error occurred while deleting the profile', 'danger'),
+}
+
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+def scrape_queued_flash(profiles: List[Dict]) -> Tuple[str, str]:
+    return f'Scrape job queued for {len(profiles)} profiles', 'info'
+
+def profile_toggled_flash(active: bool) -> Tuple[str, str]:
+    return f"Profile {'activated' if active else 'deactivated'} successfully", 'success'
+
+def database_form(form) -> Tuple[str, str, Optional[str]]:
+    """(name, slug, FLASH key of the validation error or None) of the add database form"""
+    name, slug = form.get('name'), form.get('slug')
+    return name, slug, None if name and slug else 'database_fields_required'
+
+def profile_form(form) -> Tuple[Optional[str], str, Optional[str]]:
+    """(normalized URL, description, FLASH key of the validation error or None) of the add profile form"""
+    url = form.get('profile_url')
+    description = form.get('description', '')
+    if not url:
+        return None, description, 'profile_url_required'
+    normalized_url = normalize_x_url(url)
+    if not is_valid_x_url(normalized_url):
+        return None, description, 'profile_url_invalid'
+    return normalized_url, description, None
+
+def database_view(database: Dict, profiles: List[Dict]) -> Dict:
+    """Template context of a database page, also the source of its API payloads"""
+    # Record counts are counters maintained on the documents
+    for profile in profiles:
+        profile.setdefault('record_count', 0)
+    return {
+        'database': database,
+        'profiles': profiles,
+        'active_profiles': sum(1 for p in profiles if p.get('active', True)),
+        'total_records': database.get('record_count', 0)
+    }
+
+def records_filter(database: Dict, profile: Dict) -> Dict:
+    return {'database_id': database['_id'], 'profile_id': profile['_id']}
+
+def records_page_args(args) -> Dict:
+    """after, before and limit of a records page request"""
+    return {
+        'after': args.get('after'),
+        'before': args.get('before'),
+        'limit': clamp_page_size(args.get('limit'))
+    }
+
+def records_page_etag(profile: Dict, page: Dict) -> str:
+    return records_etag(profile, page['after'], page['before'], page['limit'])
+
+def profile_etag(profile: Dict) -> str:
+    return make_etag(str(profile['_id']), profile.get('last_scraped'), profile.get('active', True),
+                     profile.get('record_count'), profile.get('description'))
+
+def databases_payload(databases: List[Dict]) -> Dict:
+    return {'databases': [serialize_document(db) for db in databases]}
+
+def database_payload(view: Dict) -> Dict:
+    return {
+        **serialize_document(view['database']),
+        'active_profiles': view['active_profiles'],
+        'profile_count': len(view['profiles'])
+    }
+
+def profiles_payload(view: Dict) -> Dict:
+    return {'profiles': [serialize_document(profile) for profile in view['profiles']]}
+
+def records_payload(records: List[Dict], limit: int, next_token: Optional[str], prev_token: Optional[str]) -> Dict:
+    return {
+        'records': [serialize_document(record) for record in records],
+        'limit': limit,
+        'next': next_token,
+        'prev': prev_token
+    }
+
+def job_finished(job: Optional[Dict]) -> bool:
+    """True if there is nothing left to stream for a job"""
+    return not job or job['status'] in (JOB_DONE, JOB_FAILED)
+
+def ends_job_stream(event: Dict, job_id: Optional[str]) -> bool:
+    """True for the last event of a job's event stream"""
+    return bool(job_id) and event['type'] == 'job_finished'